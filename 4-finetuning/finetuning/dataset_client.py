@@ -1,11 +1,10 @@
-import json
+import hashlib
 import logging
 import os
 
 
 from comet_ml import Experiment
 from finetuning.settings import settings
-from sklearn.model_selection import train_test_split
 
 
 class DatasetClient:
@@ -26,29 +25,81 @@ class DatasetClient:
         except Exception as e:
             logging.error(f"Error retrieving artifact: {str(e)}")
 
-    def split_data(self, artifact_name: str) -> tuple:
+    def split_data(self, artifact_name: str, test_size: float = 0.2) -> tuple:
         try:
-            training_file_path = os.path.join(self.output_dir, "train.json")
-            validation_file_path = os.path.join(self.output_dir, "validation.json")
-            file_name = artifact_name + ".json"
-            with open(os.path.join(self.output_dir, file_name), "r") as file:
-                data = json.load(file)
-
-            train_data, val_data = train_test_split(
-                data, test_size=0.2, random_state=42
-            )
+            training_file_path = os.path.join(self.output_dir, "train.jsonl")
+            validation_file_path = os.path.join(self.output_dir, "validation.jsonl")
+            file_name = artifact_name + ".jsonl"
+
+            # Single pass over the JSONL artifact: every record is assigned to a split
+            # from the hash of its content, so the split is deterministic and only one
+            # record is held in memory at a time.
+            num_records, num_validation_records = 0, 0
+            closest_training_record, closest_bucket = None, None
+            with open(os.path.join(self.output_dir, file_name), "r") as file, open(
+                training_file_path, "w"
+            ) as train_file, open(validation_file_path, "w") as val_file:
+                for line in file:
+                    if not line.strip():
+                        continue
 
-            with open(training_file_path, "w") as train_file:
-                json.dump(train_data, train_file)
+                    num_records += 1
+                    bucket = get_record_bucket(line)
+                    if bucket < test_size * 10_000:
+                        val_file.write(line)
+                        num_validation_records += 1
+                    else:
+                        train_file.write(line)
+                        if closest_bucket is None or bucket < closest_bucket:
+                            closest_training_record, closest_bucket = line, bucket
 
-            with open(validation_file_path, "w") as val_file:
-                json.dump(val_data, val_file)
+            if num_records < 2:
+                raise ValueError(
+                    f"{file_name} has {num_records} records, at least 2 are needed "
+                    "for a training and a validation split."
+                )
 
-            logging.info("Data split into train.json and validation.json successfully.")
+            # The split is only `test_size` on average, so a small dataset may hash
+            # no record into validation. The training record with the bucket closest
+            # to the validation buckets is moved there, so the split stays
+            # deterministic.
+            if num_validation_records == 0:
+                move_record(
+                    closest_training_record, training_file_path, validation_file_path
+                )
+
+            logging.info(
+                "Data split into train.jsonl and validation.jsonl successfully."
+            )
             return training_file_path, validation_file_path
-        except Exception as e:
+        except OSError as e:
             logging.error(f"Error splitting data: {str(e)}")
 
     def download_dataset(self, file_name: str):
         self.get_artifact(file_name)
         return self.split_data(file_name)
+
+
+def get_record_bucket(record: str) -> int:
+    return int(hashlib.md5(record.strip().encode()).hexdigest(), 16) % 10_000
+
+
+def move_record(record: str, source_file_path: str, target_file_path: str) -> None:
+    """Move one occurrence of the record from one JSONL file to the end of another."""
+
+    temporary_file_path = source_file_path + ".tmp"
+    with open(source_file_path, "r") as source_file, open(
+        temporary_file_path, "w"
+    ) as temporary_file:
+        moved = False
+        for line in source_file:
+            if not moved and line == record:
+                moved = True
+
+                continue
+
+            temporary_file.write(line)
+    os.replace(temporary_file_path, source_file_path)
+
+    with open(target_file_path, "a") as target_file:
+        target_file.write(record if record.endswith("\n") else record + "\n")
@@ -12,4 +12,7 @@ class AppSettings(BaseSettings):
     COMET_WORKSPACE: str = ""
     COMET_PROJECT: str = ""
 
+    PACK_SEQUENCES: bool = False
+    TOKENIZED_DATASET_CACHE_DIR: str = "./tokenized_datasets"
+
 settings = AppSettings()
\ No newline at end of file
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from finetuning.dataset_client import DatasetClient, get_record_bucket
+
+
+def write_artifact(output_dir, records: list[dict]) -> list[str]:
+    lines = [json.dumps(record) + "\n" for record in records]
+    (output_dir / "posts.jsonl").write_text("".join(lines))
+
+    return lines
+
+
+def read_lines(file_path: str) -> list[str]:
+    with open(file_path) as file:
+        return file.readlines()
+
+
+@pytest.fixture
+def client(tmp_path):
+    """Fixture to create a dataset client that reads and writes in a temporary dir."""
+    client_instance = DatasetClient.__new__(DatasetClient)
+    client_instance.output_dir = str(tmp_path)
+
+    return client_instance
+
+
+def test_every_record_is_assigned_to_one_split(client, tmp_path):
+    """Test that the split keeps every record exactly once and is deterministic."""
+    lines = write_artifact(
+        tmp_path, [{"instruction": f"i{i}", "content": f"c{i}"} for i in range(50)]
+    )
+
+    train_file, validation_file = client.split_data("posts")
+    train_lines, validation_lines = read_lines(train_file), read_lines(validation_file)
+
+    assert sorted(train_lines + validation_lines) == sorted(lines)
+    assert validation_lines
+    assert client.split_data("posts") == (train_file, validation_file)
+    assert read_lines(validation_file) == validation_lines
+
+
+def test_a_record_is_moved_to_an_empty_validation_split(client, tmp_path):
+    """Test that the training record closest to validation is moved to it if needed."""
+    lines = write_artifact(
+        tmp_path, [{"instruction": f"i{i}", "content": f"c{i}"} for i in range(3)]
+    )
+
+    train_file, validation_file = client.split_data("posts", test_size=0.0)
+
+    closest_line = min(lines, key=get_record_bucket)
+    assert read_lines(validation_file) == [closest_line]
+    assert read_lines(train_file) == [line for line in lines if line != closest_line]
+
+
+def test_a_single_record_cannot_be_split(client, tmp_path):
+    """Test that a dataset too small for both splits is a clear error."""
+    write_artifact(tmp_path, [{"instruction": "i", "content": "c"}])
+
+    with pytest.raises(ValueError, match="at least 2"):
+        client.split_data("posts")
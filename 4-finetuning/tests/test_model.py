@@ -0,0 +1,217 @@
+import pytest
+import torch
+from tokenizers import Tokenizer, models, pre_tokenizers, processors
+from transformers import MistralConfig, MistralForCausalLM, PreTrainedTokenizerFast
+
+from finetuning import CopywriterMistralModel
+from finetuning.model import DynamicPaddingCollator, pack_sequences
+
+PROMPTS = [
+    "Write me a Linkedin post about Data Science",
+    "Write me an article about vector databases and how they work",
+    "Hi",
+]
+
+
+def build_tokenizer() -> PreTrainedTokenizerFast:
+    special_tokens = ["<unk>", "<s>", "</s>"]
+    words = sorted({word for prompt in PROMPTS for word in prompt.split()})
+    vocab = {token: i for i, token in enumerate(special_tokens + words)}
+
+    tokenizer = Tokenizer(models.WordLevel(vocab=vocab, unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="<s> $A", special_tokens=[("<s>", vocab["<s>"])]
+    )
+
+    return PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer,
+        unk_token="<unk>",
+        bos_token="<s>",
+        eos_token="</s>",
+        model_input_names=["input_ids", "attention_mask"],
+    )
+
+
+@pytest.fixture(scope="module")
+def model():
+    """Fixture to create a model instance backed by a tiny, seeded CPU model."""
+    model_instance = CopywriterMistralModel.__new__(CopywriterMistralModel)
+    model_instance.tokenizer = build_tokenizer()
+    model_instance.tokenizer.pad_token = model_instance.tokenizer.eos_token
+    model_instance.tokenizer.padding_side = "right"
+
+    # The weights are built from a fixed seed instead of being downloaded, so the
+    # greedy outputs are the same on every run.
+    torch.manual_seed(0)
+    config = MistralConfig(
+        vocab_size=len(model_instance.tokenizer),
+        hidden_size=32,
+        intermediate_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        num_key_value_heads=2,
+        max_position_embeddings=128,
+        bos_token_id=model_instance.tokenizer.bos_token_id,
+        eos_token_id=model_instance.tokenizer.eos_token_id,
+        pad_token_id=model_instance.tokenizer.pad_token_id,
+    )
+    model_instance.model = MistralForCausalLM(config).eval()
+
+    return model_instance
+
+
+def test_generate_batch_returns_one_output_per_prompt(model):
+    """Test that every prompt of the batch gets its own output."""
+    outputs = model.generate_batch(PROMPTS, max_new_tokens=4, do_sample=False)
+
+    assert len(outputs) == len(PROMPTS)
+    assert all(isinstance(output, str) for output in outputs)
+
+
+def test_generate_batch_matches_unbatched_generation(model):
+    """Test that batching does not change the greedy output of the unpadded prompt."""
+    # Only the longest prompt has no padding tokens, so its logits are computed over
+    # exactly the same inputs with and without batching. The padded rows can differ
+    # by floating point noise, which may flip a greedy choice of the random model.
+    prompt_lengths = [len(model.tokenizer(prompt)["input_ids"]) for prompt in PROMPTS]
+    unpadded_index = prompt_lengths.index(max(prompt_lengths))
+    unpadded_prompt = PROMPTS[unpadded_index]
+
+    batched_output = model.generate_batch(PROMPTS, max_new_tokens=4, do_sample=False)[
+        unpadded_index
+    ]
+    single_output = model.generate_batch(
+        [unpadded_prompt], max_new_tokens=4, do_sample=False
+    )[0]
+
+    assert single_output
+    assert batched_output == single_output
+
+
+def test_generate_batch_strips_prompt_tokens(model):
+    """Test that the outputs contain only the generated tokens."""
+    outputs = model.generate_batch(PROMPTS, max_new_tokens=4, do_sample=False)
+
+    for prompt, output in zip(PROMPTS[:2], outputs):
+        assert prompt not in output
+
+
+def test_generate_batch_restores_padding_side(model):
+    """Test that the tokenizer keeps the right padding used for training."""
+    model.generate_batch(PROMPTS, max_new_tokens=1, do_sample=False)
+
+    assert model.tokenizer.padding_side == "right"
+
+
+def test_generate_stream_matches_generate_batch(model):
+    """Test that the streamed chunks add up to the non-streamed output."""
+    prompt = PROMPTS[1]
+
+    streamed_output = "".join(
+        model.generate_stream(prompt, max_new_tokens=4, do_sample=False)
+    )
+    output = model.generate_batch([prompt], max_new_tokens=4, do_sample=False)[0]
+
+    assert output
+    assert streamed_output == output
+
+
+def test_generate_stream_raises_generation_errors(model, monkeypatch):
+    """Test that an error of the generation thread is raised to the consumer."""
+
+    def failing_generate(**kwargs):
+        raise RuntimeError("generation failed")
+
+    monkeypatch.setattr(model.model, "generate", failing_generate)
+
+    with pytest.raises(RuntimeError, match="generation failed"):
+        list(model.generate_stream(PROMPTS[1], max_new_tokens=4, timeout_seconds=5))
+
+
+def test_collator_pads_to_the_longest_sample(model):
+    """Test that a batch is padded to its longest sample, with -100 for the labels."""
+    features = [
+        {"input_ids": [1, 5, 6], "attention_mask": [1, 1, 1], "length": 3},
+        {"input_ids": [1, 7], "attention_mask": [1, 1], "length": 2},
+    ]
+    for feature in features:
+        feature["labels"] = feature["input_ids"].copy()
+    collator = DynamicPaddingCollator(model.tokenizer, padding="longest")
+
+    batch = collator(features)
+
+    pad_token_id = model.tokenizer.pad_token_id
+    assert "length" not in batch
+    assert batch["input_ids"].tolist() == [[1, 5, 6], [1, 7, pad_token_id]]
+    assert batch["attention_mask"].tolist() == [[1, 1, 1], [1, 1, 0]]
+    assert batch["labels"].tolist() == [[1, 5, 6], [1, 7, -100]]
+
+
+def test_collator_pads_to_a_multiple_of(model):
+    """Test that the padded length is rounded up to `pad_to_multiple_of`."""
+    features = [
+        {"input_ids": [1, 5, 6], "attention_mask": [1, 1, 1], "labels": [1, 5, 6]}
+    ]
+    collator = DynamicPaddingCollator(
+        model.tokenizer, padding="longest", pad_to_multiple_of=8
+    )
+
+    batch = collator(features)
+
+    assert batch["input_ids"].shape == (1, 8)
+    assert batch["labels"].tolist() == [[1, 5, 6] + [-100] * 5]
+
+
+def test_pack_sequences_splits_samples_at_max_length():
+    """Test that the samples are concatenated and split into max_length chunks."""
+    batch = {
+        "input_ids": [[1, 3, 4, 2], [1, 5, 2]],
+        "attention_mask": [[1, 1, 1, 1], [1, 1, 1]],
+    }
+
+    packed = pack_sequences(batch, max_length=3, eos_token_id=2)
+
+    assert packed["input_ids"] == [[1, 3, 4], [2, 1, 5], [2]]
+    assert packed["attention_mask"] == [[1, 1, 1], [1, 1, 1], [1]]
+    assert packed["labels"] == packed["input_ids"]
+    assert packed["length"] == [3, 3, 1]
+
+
+def test_pack_sequences_ends_every_sample_with_eos():
+    """Test that EOS separates the samples whose own EOS was truncated away."""
+    batch = {
+        "input_ids": [[1, 3, 4], [1, 5, 2], [1, 6]],
+        "attention_mask": [[1, 1, 1], [1, 1, 1], [1, 1]],
+    }
+
+    packed = pack_sequences(batch, max_length=10, eos_token_id=2)
+
+    assert packed["input_ids"] == [[1, 3, 4, 2, 1, 5, 2, 1, 6, 2]]
+    assert packed["attention_mask"] == [[1] * 10]
+
+
+def test_tokenized_dataset_cache_key(model, tmp_path):
+    """Test that the cache key changes with max_length, the tokenizer or the data."""
+    train_file = tmp_path / "train.jsonl"
+    validation_file = tmp_path / "validation.jsonl"
+    train_file.write_text('{"instruction": "Hi", "content": "Hi"}\n')
+    validation_file.write_text('{"instruction": "Hi", "content": "Hello"}\n')
+    data_files = {"train": str(train_file), "validation": str(validation_file)}
+    model.max_length = 32
+
+    cache_dir = model._get_tokenized_dataset_cache_dir(data_files)
+    assert model._get_tokenized_dataset_cache_dir(data_files) == cache_dir
+
+    model.max_length = 64
+    assert model._get_tokenized_dataset_cache_dir(data_files) != cache_dir
+    model.max_length = 32
+
+    tokenizer = model.tokenizer
+    model.tokenizer = build_tokenizer()
+    model.tokenizer.add_tokens(["Hello"])
+    assert model._get_tokenized_dataset_cache_dir(data_files) != cache_dir
+    model.tokenizer = tokenizer
+
+    validation_file.write_text('{"instruction": "Hi", "content": "Hey"}\n')
+    assert model._get_tokenized_dataset_cache_dir(data_files) != cache_dir
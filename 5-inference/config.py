@@ -24,10 +24,53 @@ class AppSettings(BaseSettings):
     QDRANT_CLOUD_URL: str = "str"
     QDRANT_APIKEY: str | None = None
 
+    # LLM cache config
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_SIZE: int = 1024
+    LLM_CACHE_TTL_SECONDS: float = 24 * 60 * 60
+    LLM_CACHE_SQLITE_PATH: str | None = None  # e.g. ".cache/llm_cache.sqlite"
+    LLM_CACHE_PURGE_INTERVAL_SECONDS: float = 60 * 60
+    LLM_CACHE_DETERMINISTIC_ONLY: bool = True
+
     # RAG config
     TOP_K: int = 5
     KEEP_TOP_K: int = 5
     EXPAND_N_QUERY: int = 5
+    RAG_FUSION_METHOD: str = "rrf"  # or "max" to keep the best score of every chunk
+    RAG_FUSION_RRF_K: int = 60
+    RAG_FUSION_MAX_CANDIDATES: int = 15
+    RAG_POST_FILTER_OVERFETCH: int = 4
+    CONTEXT_MAX_TOKENS: int = 1536
+    CONTEXT_TOKEN_CACHE_MAX_SIZE: int = 10_000
+
+    # Reranking config
+    RERANKER_BACKEND: str = "openai"  # or "cross-encoder" to rerank locally
+    RERANKER_CROSS_ENCODER_MODEL_ID: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANKER_BATCH_SIZE: int = 32
+    RERANKER_USE_ONNX: bool = False
+    RERANKER_QUANTIZE: bool = False
+    RERANKER_ONNX_EXPORT_DIR: str = ".cache/reranker-onnx"
+
+    # Monitoring config
+    MONITORING_SINK: str = "comet"  # or "jsonl" for tests and offline runs
+    MONITORING_JSONL_PATH: str = ".cache/monitoring/events.jsonl"
+    MONITORING_QUEUE_MAX_SIZE: int = 1000
+    MONITORING_BATCH_SIZE: int = 32
+    MONITORING_FLUSH_INTERVAL_SECONDS: float = 2.0
+    MONITORING_SAMPLE_RATE: float = 1.0
+
+    # LLM evaluation config
+    # When True, `generate` returns before the evaluation is done and its result is only
+    # attached to the monitoring record, so `llm_evaluation_result` is None.
+    LLM_EVALUATION_DEFERRED: bool = False
+    LLM_EVALUATION_SAMPLE_RATE: float = 1.0
+    LLM_EVALUATION_MAX_WORKERS: int = 4
+
+    # Semantic answer cache config
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_THRESHOLD: float = 0.95
+    SEMANTIC_CACHE_MAX_SIZE: int = 1024
+    SEMANTIC_CACHE_TTL_SECONDS: float = 60 * 60
 
     # MQ config
     RABBITMQ_HOST: str = "mq"
@@ -45,6 +88,10 @@ class AppSettings(BaseSettings):
     HUGGINGFACE_ACCESS_TOKEN: str | None = None
     MODEL_TYPE: str = "mistralai/Mistral-7B-Instruct-v0.1"
 
+    MODEL_ENDPOINT: str = "qwak"  # or "fake" to run without a deployed model
+    MICRO_BATCH_MAX_SIZE: int = 8
+    MICRO_BATCH_MAX_WAIT_MS: float = 10.0
+
     QWAK_DEPLOYMENT_MODEL_ID: str = "copywriter_model"
     QWAK_DEPLOYMENT_MODEL_API: str = (
         "https://models.llm-twin.qwak.ai/v1/copywriter_model/default/predict"
@@ -1,12 +1,17 @@
+import hashlib
 import logging
 import os
+import queue
+from threading import Thread
+from typing import Iterator
 
 import pandas as pd
 import qwak
 import torch as th
 import yaml
 from comet_ml import Experiment
-from datasets import DatasetDict, load_dataset
+from datasets import DatasetDict, load_dataset, load_from_disk
+from datasets.fingerprint import Hasher
 from peft import LoraConfig, PeftModel, get_peft_model, prepare_model_for_kbit_training
 from qwak.model.adapters import DefaultOutputAdapter
 from qwak.model.base import QwakModel
@@ -16,7 +21,9 @@ from transformers import (
     AutoModelForCausalLM,
     AutoTokenizer,
     BitsAndBytesConfig,
+    DataCollatorForSeq2Seq,
     PreTrainedModel,
+    TextIteratorStreamer,
     Trainer,
     TrainingArguments,
 )
@@ -33,6 +40,7 @@ class CopywriterMistralModel(QwakModel):
         model_type: str = "mistralai/Mistral-7B-Instruct-v0.1",
         comet_artifact_name: str = "cleaned_posts",
         config_file: str = "./finetuning/config.yaml",
+        max_length: int = 100,
     ) -> None:
         self._prep_environment()
 
@@ -41,6 +49,7 @@ class CopywriterMistralModel(QwakModel):
         self.model_type = model_type
         self.comet_dataset_artifact = comet_artifact_name
         self.training_args_config_file = config_file
+        self.max_length = max_length
         if is_saved:
             self.experiment = Experiment(
                 api_key=settings.COMET_API_KEY,
@@ -116,13 +125,15 @@ class CopywriterMistralModel(QwakModel):
         return result
 
     def tokenize(self, prompt: str) -> dict:
+        # Samples are not padded here: the data collator pads every batch to its
+        # longest sample, and the trainer groups samples of similar length together.
         result = self.tokenizer(
             prompt,
-            padding="max_length",
-            max_length=100,
+            max_length=self.max_length,
             truncation=True,
         )
         result["labels"] = result["input_ids"].copy()
+        result["length"] = len(result["input_ids"])
         return result
 
     def load_dataset(self) -> DatasetDict:
@@ -131,9 +142,30 @@ class CopywriterMistralModel(QwakModel):
             self.comet_dataset_artifact
         )
         data_files = {"train": train_data_file, "validation": validation_data_file}
+
+        cache_dir = self._get_tokenized_dataset_cache_dir(data_files)
+        if os.path.exists(cache_dir):
+            logging.info(f"Loading tokenized dataset from cache {cache_dir}")
+            return load_from_disk(cache_dir)
+
         raw_datasets = load_dataset("json", data_files=data_files)
         train_dataset, val_dataset = self.preprocess_data_split(raw_datasets)
-        return DatasetDict({"train": train_dataset, "validation": val_dataset})
+        tokenized_datasets = DatasetDict(
+            {"train": train_dataset, "validation": val_dataset}
+        )
+        tokenized_datasets.save_to_disk(cache_dir)
+        logging.info(f"Saved tokenized dataset to cache {cache_dir}")
+        return tokenized_datasets
+
+    def _get_tokenized_dataset_cache_dir(self, data_files: dict) -> str:
+        # The tokenized dataset is reused only if the tokenizer, the raw data and the
+        # preprocessing options are all the same.
+        hasher = Hasher()
+        hasher.update(self.tokenizer)
+        hasher.update(hash_files(list(data_files.values())))
+        hasher.update((self.max_length, settings.PACK_SEQUENCES))
+
+        return os.path.join(settings.TOKENIZED_DATASET_CACHE_DIR, hasher.hexdigest())
 
     def preprocess_data_split(self, raw_datasets: DatasetDict):
         train_data = raw_datasets["train"]
@@ -146,8 +178,24 @@ class CopywriterMistralModel(QwakModel):
         generated_val_dataset = generated_val_dataset.remove_columns(
             ["instruction", "content"]
         )
+        if settings.PACK_SEQUENCES:
+            generated_train_dataset = self.pack_dataset(generated_train_dataset)
+            generated_val_dataset = self.pack_dataset(generated_val_dataset)
         return generated_train_dataset, generated_val_dataset
 
+    def pack_dataset(self, dataset):
+        """Concatenate the samples and split them into sequences of `max_length` tokens."""
+
+        return dataset.map(
+            pack_sequences,
+            batched=True,
+            remove_columns=dataset.column_names,
+            fn_kwargs={
+                "max_length": self.max_length,
+                "eos_token_id": self.tokenizer.eos_token_id,
+            },
+        )
+
     def build(self):
         self._init_4bit_config()
         self.init_model()
@@ -164,6 +212,9 @@ class CopywriterMistralModel(QwakModel):
             train_dataset=tokenized_datasets["train"],
             eval_dataset=tokenized_datasets["validation"],
             tokenizer=self.tokenizer,
+            data_collator=DynamicPaddingCollator(
+                self.tokenizer, padding="longest", pad_to_multiple_of=8
+            ),
         )
 
         logging.info("Initialized model trainer")
@@ -192,20 +243,148 @@ class CopywriterMistralModel(QwakModel):
     @qwak.api(output_adapter=DefaultOutputAdapter())
     def predict(self, df):
         input_text = list(df["instruction"].values)
-        input_ids = self.tokenizer(
-            input_text, return_tensors="pt", add_special_tokens=True
-        )
-        input_ids = input_ids.to(self.device)
+        decoded_outputs = self.generate_batch(input_text)
+
+        return pd.DataFrame([{"content": output} for output in decoded_outputs])
+
+    def generate_batch(
+        self, prompts: list[str], max_new_tokens: int = 500, do_sample: bool = True
+    ) -> list[str]:
+        # Decoder-only models continue from the last position of every row, so the
+        # batch is left-padded. The tokenizer is right-padded for training, hence
+        # the padding side is restored afterwards.
+        padding_side = self.tokenizer.padding_side
+        self.tokenizer.padding_side = "left"
+        try:
+            inputs = self.tokenizer(
+                prompts, return_tensors="pt", padding=True, add_special_tokens=True
+            )
+        finally:
+            self.tokenizer.padding_side = padding_side
+        inputs = inputs.to(self.model.device)
 
         generated_ids = self.model.generate(
-            **input_ids,
-            max_new_tokens=500,
-            do_sample=True,
-            pad_token_id=self.tokenizer.eos_token_id,
+            **inputs,
+            max_new_tokens=max_new_tokens,
+            do_sample=do_sample,
+            pad_token_id=self.tokenizer.pad_token_id,
+        )
+
+        # With left padding every prompt ends at the same position, so the prompt
+        # tokens are stripped from all the rows at once.
+        prompt_length = inputs["input_ids"].shape[1]
+        decoded_outputs = self.tokenizer.batch_decode(
+            generated_ids[:, prompt_length:], skip_special_tokens=True
+        )
+
+        return decoded_outputs
+
+    def predict_stream(self, df) -> Iterator[str]:
+        """Streaming variant of `predict` for a single instruction row."""
+
+        input_text = df["instruction"].values[0]
+
+        yield from self.generate_stream(input_text)
+
+    def generate_stream(
+        self,
+        prompt: str,
+        max_new_tokens: int = 500,
+        do_sample: bool = True,
+        timeout_seconds: float = 60.0,
+    ) -> Iterator[str]:
+        inputs = self.tokenizer(
+            prompt, return_tensors="pt", add_special_tokens=True
+        ).to(self.model.device)
+        # Without a timeout the consumer would wait forever for a token that a dead
+        # generation thread never produces.
+        streamer = TextIteratorStreamer(
+            self.tokenizer,
+            skip_prompt=True,
+            skip_special_tokens=True,
+            timeout=timeout_seconds,
         )
+        generation_errors = []
+
+        def generate() -> None:
+            try:
+                self.model.generate(
+                    **inputs,
+                    streamer=streamer,
+                    max_new_tokens=max_new_tokens,
+                    do_sample=do_sample,
+                    pad_token_id=self.tokenizer.pad_token_id,
+                )
+            except Exception as e:
+                generation_errors.append(e)
+                streamer.end()
+
+        # generate() blocks until the last token, so it runs in a background thread
+        # while the streamer yields the decoded text as soon as it is produced.
+        generation_thread = Thread(target=generate, daemon=True)
+        generation_thread.start()
+
+        try:
+            yield from streamer
+        except queue.Empty:
+            raise TimeoutError(
+                f"No token was generated within {timeout_seconds} seconds."
+            ) from None
+
+        generation_thread.join()
+        if generation_errors:
+            raise generation_errors[0]
+
+
+class DynamicPaddingCollator(DataCollatorForSeq2Seq):
+    """
+    Pads every batch to its longest sample (labels with -100). The `length` column is
+    only used by the trainer to group samples of similar length, so it is dropped here.
+    """
+
+    def __call__(self, features: list[dict], return_tensors=None) -> dict:
+        features = [
+            {key: value for key, value in feature.items() if key != "length"}
+            for feature in features
+        ]
+
+        return super().__call__(features, return_tensors=return_tensors)
+
+
+def hash_files(file_paths: list[str]) -> str:
+    file_hash = hashlib.md5()
+    for file_path in file_paths:
+        with open(file_path, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                file_hash.update(block)
+
+    return file_hash.hexdigest()
+
+
+def pack_sequences(batch: dict, max_length: int, eos_token_id: int) -> dict:
+    # Every sample ends with EOS, so the boundaries are still marked once the samples
+    # are concatenated, even for the samples whose `</s>` was truncated away.
+    input_ids, attention_mask = [], []
+    for sample_input_ids, sample_attention_mask in zip(
+        batch["input_ids"], batch["attention_mask"]
+    ):
+        input_ids.extend(sample_input_ids)
+        attention_mask.extend(sample_attention_mask)
+        if not sample_input_ids or sample_input_ids[-1] != eos_token_id:
+            input_ids.append(eos_token_id)
+            attention_mask.append(1)
 
-        decoded_output = self.tokenizer.batch_decode(
-            generated_ids[input_ids.shape[0] :]
-        )[0]
+    packed_input_ids = [
+        input_ids[i : i + max_length] for i in range(0, len(input_ids), max_length)
+    ]
+    packed_attention_mask = [
+        attention_mask[i : i + max_length]
+        for i in range(0, len(attention_mask), max_length)
+    ]
 
-        return pd.DataFrame([{"content": decoded_output}])
+    return {
+        "input_ids": packed_input_ids,
+        "attention_mask": packed_attention_mask,
+        "labels": [sample.copy() for sample in packed_input_ids],
+        "length": [len(sample) for sample in packed_input_ids],
+    }
@@ -10,5 +10,8 @@ class AppSettings(BaseSettings):
     COMET_WORKSPACE: str = ""
     COMET_PROJECT: str = ""
 
+    PACK_SEQUENCES: bool = False
+    TOKENIZED_DATASET_CACHE_DIR: str = "./tokenized_datasets"
+
 
 settings = AppSettings()
@@ -1,20 +1,54 @@
+import asyncio
+import atexit
+import concurrent.futures
+import random
+import time
+from typing import Iterator
+
+import core.logger_utils as logger_utils
+import numpy as np
 import pandas as pd
 from evaluation import evaluate_llm
+from langchain.prompts import PromptTemplate
+from llm.batching import MicroBatcher
+from llm.endpoints import FakeRealTimeClient, parse_predictions
+from llm.semantic_cache import SemanticAnswerCache
 from llm.prompt_templates import InferenceTemplate
 from monitoring import PromptMonitoringManager
 from qwak_inference import RealTimeClient
+from rag.context_packing import ContextPacker, get_tokenizer
 from rag.retriever import VectorRetriever
 from config import settings
 
+logger = logger_utils.get_logger(__name__)
+
 
 class LLMTwin:
     def __init__(self) -> None:
-        self.qwak_client = RealTimeClient(
-            model_id=settings.QWAK_DEPLOYMENT_MODEL_ID,
-            model_api=settings.QWAK_DEPLOYMENT_MODEL_API,
-        )
+        if settings.MODEL_ENDPOINT == "qwak":
+            self.qwak_client = RealTimeClient(
+                model_id=settings.QWAK_DEPLOYMENT_MODEL_ID,
+                model_api=settings.QWAK_DEPLOYMENT_MODEL_API,
+            )
+        elif settings.MODEL_ENDPOINT == "fake":
+            self.qwak_client = FakeRealTimeClient()
+        else:
+            raise ValueError(f"Unsupported model endpoint: {settings.MODEL_ENDPOINT}")
+        self.micro_batcher = MicroBatcher(predict_batch=self._predict_batch)
         self.template = InferenceTemplate()
+        self.retriever = VectorRetriever()
+        self.context_packer = ContextPacker()
+        self.semantic_cache = (
+            SemanticAnswerCache() if settings.SEMANTIC_CACHE_ENABLED else None
+        )
         self.prompt_monitoring_manager = PromptMonitoringManager()
+        self.evaluation_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=settings.LLM_EVALUATION_MAX_WORKERS,
+            thread_name_prefix="llm-evaluation",
+        )
+        # Registered after the monitoring manager, so the deferred evaluations are
+        # finished (and logged) before the monitoring queue is flushed.
+        atexit.register(self.evaluation_executor.shutdown, wait=True)
 
     def generate(
         self,
@@ -22,28 +56,226 @@ class LLMTwin:
         enable_rag: bool = False,
         enable_evaluation: bool = False,
         enable_monitoring: bool = True,
+        defer_evaluation: bool = settings.LLM_EVALUATION_DEFERRED,
+    ) -> dict:
+        query_embedding, author_id = None, None
+        if enable_rag is True and self.semantic_cache is not None:
+            cached_answer, query_embedding, author_id = self._lookup_semantic_cache(
+                query
+            )
+            if cached_answer is not None:
+                return {"answer": cached_answer, "llm_evaluation_result": None}
+
+        prompt, prompt_template, prompt_template_variables, author_id = (
+            self._build_prompt(query, enable_rag=enable_rag, author_id=author_id)
+        )
+        answer = self._predict_batch([prompt])[0]
+        if query_embedding is not None:
+            self.semantic_cache.update(query_embedding, author_id, answer=answer)
+
+        return self._postprocess(
+            query=query,
+            prompt=prompt,
+            prompt_template=prompt_template,
+            prompt_template_variables=prompt_template_variables,
+            answer=answer,
+            enable_evaluation=enable_evaluation,
+            enable_monitoring=enable_monitoring,
+            defer_evaluation=defer_evaluation,
+        )
+
+    async def agenerate(
+        self,
+        query: str,
+        enable_rag: bool = False,
+        enable_evaluation: bool = False,
+        enable_monitoring: bool = True,
+        defer_evaluation: bool = settings.LLM_EVALUATION_DEFERRED,
     ) -> dict:
+        """
+        Async variant of `generate` for concurrent callers. The prompts of the requests
+        that arrive together are sent to the model in a single micro-batch.
+        """
+
+        query_embedding, author_id = None, None
+        if enable_rag is True and self.semantic_cache is not None:
+            cached_answer, query_embedding, author_id = await asyncio.to_thread(
+                self._lookup_semantic_cache, query
+            )
+            if cached_answer is not None:
+                return {"answer": cached_answer, "llm_evaluation_result": None}
+
+        prompt, prompt_template, prompt_template_variables, author_id = (
+            await asyncio.to_thread(
+                self._build_prompt, query, enable_rag=enable_rag, author_id=author_id
+            )
+        )
+        answer = await self.micro_batcher.submit(prompt)
+        if query_embedding is not None:
+            self.semantic_cache.update(query_embedding, author_id, answer=answer)
+
+        return await asyncio.to_thread(
+            self._postprocess,
+            query=query,
+            prompt=prompt,
+            prompt_template=prompt_template,
+            prompt_template_variables=prompt_template_variables,
+            answer=answer,
+            enable_evaluation=enable_evaluation,
+            enable_monitoring=enable_monitoring,
+            defer_evaluation=defer_evaluation,
+        )
+
+    def generate_stream(
+        self,
+        query: str,
+        enable_rag: bool = False,
+        enable_evaluation: bool = False,
+        enable_monitoring: bool = True,
+    ) -> Iterator[str]:
+        """
+        Streaming variant of `generate` that yields the answer as it is produced. The
+        RAG context is retrieved before the generation starts. The time to first token
+        and the generation throughput in model tokens are added to the monitoring
+        metadata. Endpoints without `predict_stream`, such as the Qwak RealTimeClient,
+        yield the whole answer as a single chunk once it is generated.
+        """
+
+        prompt, prompt_template, prompt_template_variables, _ = self._build_prompt(
+            query, enable_rag=enable_rag
+        )
+        input_ = pd.DataFrame([{"instruction": prompt}]).to_json()
+
+        start_time = time.perf_counter()
+        predict_stream = getattr(self.qwak_client, "predict_stream", None)
+        if predict_stream is not None:
+            stream = predict_stream(input_)
+        else:
+            stream = iter(self._predict_batch([prompt]))
+
+        first_token_time = None
+        answer_chunks = []
+        try:
+            for chunk in stream:
+                if first_token_time is None:
+                    first_token_time = time.perf_counter()
+                answer_chunks.append(chunk)
+
+                yield chunk
+        finally:
+            # Runs as well when the consumer stops early or the stream fails, so the
+            # partial answer is still monitored.
+            end_time = time.perf_counter()
+            if first_token_time is None:
+                first_token_time = end_time
+            generation_time = end_time - first_token_time
+            answer = "".join(answer_chunks)
+            num_tokens = len(
+                get_tokenizer(settings.MODEL_TYPE)(answer, add_special_tokens=False)[
+                    "input_ids"
+                ]
+            )
+
+            self._postprocess(
+                query=query,
+                prompt=prompt,
+                prompt_template=prompt_template,
+                prompt_template_variables=prompt_template_variables,
+                answer=answer,
+                enable_evaluation=enable_evaluation,
+                enable_monitoring=enable_monitoring,
+                defer_evaluation=True,
+                metadata={
+                    "time_to_first_token_seconds": first_token_time - start_time,
+                    "tokens_per_second": (
+                        num_tokens / generation_time if generation_time > 0 else None
+                    ),
+                },
+            )
+
+    def _lookup_semantic_cache(
+        self, query: str
+    ) -> tuple[str | None, np.ndarray, str | None]:
+        # The self-query is an LLM round-trip, so the author_id is only extracted here
+        # when a similar query is cached. Otherwise the retriever extracts it while the
+        # query is being expanded.
+        query_embedding = self.retriever.embed_query(query)
+        if not self.semantic_cache.has_candidates(query_embedding):
+            return None, query_embedding, None
+
+        author_id = self.retriever.extract_author_id(query)
+        cached_answer = self.semantic_cache.lookup(query_embedding, author_id)
+
+        return cached_answer, query_embedding, author_id
+
+    def _build_prompt(
+        self, query: str, enable_rag: bool, author_id: str | None = None
+    ) -> tuple[str, PromptTemplate, dict, str | None]:
         prompt_template = self.template.create_template(enable_rag=enable_rag)
         prompt_template_variables = {
             "question": query,
         }
 
         if enable_rag is True:
-            retriever = VectorRetriever(query=query)
-            hits = retriever.retrieve_top_k(
-                k=settings.TOP_K, to_expand_to_n_queries=settings.EXPAND_N_QUERY
+            context, author_id = self.retriever.retrieve(
+                query,
+                k=settings.TOP_K,
+                n_expansions=settings.EXPAND_N_QUERY,
+                keep_top_k=settings.KEEP_TOP_K,
+                author_id=author_id,
             )
-            context = retriever.rerank(hits=hits, keep_top_k=settings.KEEP_TOP_K)
+            context = self.context_packer.pack(context)
             prompt_template_variables["context"] = context
 
             prompt = prompt_template.format(question=query, context=context)
         else:
             prompt = prompt_template.format(question=query)
 
-        input_ = pd.DataFrame([{"instruction": prompt}]).to_json()
+        return prompt, prompt_template, prompt_template_variables, author_id
 
+    def _predict_batch(self, prompts: list[str]) -> list[str]:
+        input_ = pd.DataFrame([{"instruction": prompt} for prompt in prompts]).to_json()
         response: list[dict] = self.qwak_client.predict(input_)
-        answer = response[0]["content"][0]
+
+        return parse_predictions(response, num_instructions=len(prompts))
+
+    def _postprocess(
+        self,
+        query: str,
+        prompt: str,
+        prompt_template: PromptTemplate,
+        prompt_template_variables: dict,
+        answer: str,
+        enable_evaluation: bool,
+        enable_monitoring: bool,
+        defer_evaluation: bool,
+        metadata: dict | None = None,
+    ) -> dict:
+        # Only a fraction of the traffic is evaluated, as every evaluation is an extra
+        # GPT round-trip.
+        enable_evaluation = (
+            enable_evaluation is True
+            and random.random() < settings.LLM_EVALUATION_SAMPLE_RATE
+        )
+        monitoring_kwargs = {
+            "query": query,
+            "prompt": prompt,
+            "prompt_template": prompt_template.template,
+            "prompt_template_variables": prompt_template_variables,
+            "answer": answer,
+            "metadata": metadata,
+        }
+
+        if enable_evaluation is True and defer_evaluation is True:
+            # The answer is returned right away. The evaluation runs in the worker pool
+            # and is attached to the monitoring record once it is done.
+            self.evaluation_executor.submit(
+                self._evaluate_and_monitor,
+                enable_monitoring=enable_monitoring,
+                **monitoring_kwargs,
+            )
+
+            return {"answer": answer, "llm_evaluation_result": None}
 
         if enable_evaluation is True:
             evaluation_result = evaluate_llm(query=query, output=answer)
@@ -51,20 +283,58 @@ class LLMTwin:
             evaluation_result = None
 
         if enable_monitoring is True:
-            if evaluation_result is not None:
-                metadata = {"llm_evaluation_result": evaluation_result}
-            else:
-                metadata = None
+            self._monitor(evaluation_result=evaluation_result, **monitoring_kwargs)
+
+        return {"answer": answer, "llm_evaluation_result": evaluation_result}
+
+    def _evaluate_and_monitor(
+        self,
+        query: str,
+        prompt: str,
+        prompt_template: str,
+        prompt_template_variables: dict,
+        answer: str,
+        enable_monitoring: bool,
+        metadata: dict | None = None,
+    ) -> None:
+        try:
+            evaluation_result = evaluate_llm(query=query, output=answer)
+        except Exception:
+            logger.exception("Deferred LLM evaluation failed.")
+            evaluation_result = None
 
-            self.prompt_monitoring_manager.log(
+        if enable_monitoring is True:
+            self._monitor(
+                query=query,
                 prompt=prompt,
-                prompt_template=prompt_template.template,
+                prompt_template=prompt_template,
                 prompt_template_variables=prompt_template_variables,
-                output=answer,
+                answer=answer,
+                evaluation_result=evaluation_result,
                 metadata=metadata,
             )
-            self.prompt_monitoring_manager.log_chain(
-                query=query, response=answer, eval_output=evaluation_result
-            )
 
-        return {"answer": answer, "llm_evaluation_result": evaluation_result}
+    def _monitor(
+        self,
+        query: str,
+        prompt: str,
+        prompt_template: str,
+        prompt_template_variables: dict,
+        answer: str,
+        evaluation_result: str | None,
+        metadata: dict | None = None,
+    ) -> None:
+        metadata = dict(metadata or {})
+        if evaluation_result is not None:
+            metadata["llm_evaluation_result"] = evaluation_result
+
+        self.prompt_monitoring_manager.log(
+            prompt=prompt,
+            prompt_template=prompt_template,
+            prompt_template_variables=prompt_template_variables,
+            output=answer,
+            metadata=metadata,
+        )
+        self.prompt_monitoring_manager.log_chain(
+            query=query, response=answer, eval_output=evaluation_result
+        )
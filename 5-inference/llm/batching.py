@@ -0,0 +1,133 @@
+import asyncio
+from typing import Callable
+
+from config import settings
+
+
+class MicroBatcher:
+    """
+    Collects the prompts that arrive within `max_wait_ms` of each other (up to
+    `max_batch_size`) and sends them to the model as a single request. Every caller
+    awaits its own future, which is resolved with the answer of its row.
+    `predict_batch` is a blocking function mapping a list of prompts to a list of
+    answers of the same length; it runs in the default executor.
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[list[str]], list[str]],
+        max_batch_size: int = settings.MICRO_BATCH_MAX_SIZE,
+        max_wait_ms: float = settings.MICRO_BATCH_MAX_WAIT_MS,
+    ) -> None:
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_ms / 1000
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._collecting: list[tuple[str, asyncio.Future]] = []
+        self._dispatch_tasks: set[asyncio.Task] = set()
+
+    async def submit(self, prompt: str) -> str:
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._loop is not loop:
+            self._start(loop)
+
+        future = loop.create_future()
+        await self._queue.put((prompt, future))
+
+        return await future
+
+    async def close(self) -> None:
+        """
+        Stop collecting prompts, send the ones still waiting to the model and wait
+        for all the batches to be answered.
+        """
+
+        if self._worker is None:
+            return
+
+        if self._loop is not asyncio.get_running_loop():
+            # The worker belongs to an event loop that is already gone.
+            self._worker = None
+
+            return
+
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+        pending = self._collecting
+        self._collecting = []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for i in range(0, len(pending), self.max_batch_size):
+            self._start_dispatch(pending[i : i + self.max_batch_size])
+
+        await asyncio.gather(*self._dispatch_tasks)
+
+    def _start(self, loop: asyncio.AbstractEventLoop) -> None:
+        # The queue and the tasks are bound to the event loop they were created in,
+        # so a batcher used from a new loop (e.g. another `asyncio.run`) starts over.
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._collecting = []
+        self._dispatch_tasks = set()
+        self._worker = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        # Batches are dispatched without waiting for the previous one to finish, so
+        # a slow model call does not stop the next batch from being collected.
+        while True:
+            batch = await self._next_batch()
+            self._start_dispatch(batch)
+
+    def _start_dispatch(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        task = asyncio.create_task(self._dispatch(batch))
+        self._dispatch_tasks.add(task)
+        task.add_done_callback(self._dispatch_tasks.discard)
+
+    async def _dispatch(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        prompts = [prompt for prompt, _ in batch]
+        try:
+            answers = await asyncio.get_running_loop().run_in_executor(
+                None, self.predict_batch, prompts
+            )
+            if len(answers) != len(prompts):
+                raise RuntimeError(
+                    f"Expected {len(prompts)} answers, got {len(answers)}."
+                )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+            return
+
+        for (_, future), answer in zip(batch, answers):
+            if not future.done():
+                future.set_result(answer)
+
+    async def _next_batch(self) -> list[tuple[str, asyncio.Future]]:
+        # The batch being collected is kept on the instance, so `close` can still
+        # send it when the worker is cancelled midway.
+        self._collecting = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait_seconds
+        while len(self._collecting) < self.max_batch_size:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+
+            try:
+                self._collecting.append(
+                    await asyncio.wait_for(self._queue.get(), remaining)
+                )
+            except asyncio.TimeoutError:
+                break
+
+        batch, self._collecting = self._collecting, []
+
+        return batch
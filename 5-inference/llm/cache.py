@@ -0,0 +1,173 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from config import settings
+
+
+class BaseLLMCache(ABC):
+    """
+    Abstract class for all the caches of LLM responses.
+    """
+
+    @abstractmethod
+    def lookup(self, key: str) -> str | None:
+        pass
+
+    @abstractmethod
+    def update(self, key: str, value: str) -> None:
+        pass
+
+
+class LLMResponseCache(BaseLLMCache):
+    """
+    Two-tier cache of LLM responses: an in-process LRU backed by an optional
+    on-disk SQLite table. Entries older than `ttl_seconds` are treated as misses and
+    deleted when they are looked up. The expired rows nobody looks up again are
+    purged from the table at most every `purge_interval_seconds`, on update.
+    """
+
+    def __init__(
+        self,
+        max_size: int = settings.LLM_CACHE_MAX_SIZE,
+        ttl_seconds: float = settings.LLM_CACHE_TTL_SECONDS,
+        sqlite_path: str | None = settings.LLM_CACHE_SQLITE_PATH,
+        purge_interval_seconds: float = settings.LLM_CACHE_PURGE_INTERVAL_SECONDS,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.purge_interval_seconds = purge_interval_seconds
+        self._memory: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._metrics = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "purged": 0}
+        self._last_purge_at = time.time()
+
+        self._db = None
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache "
+                "(key TEXT PRIMARY KEY, value TEXT, created_at REAL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS llm_cache_created_at "
+                "ON llm_cache (created_at)"
+            )
+            self._db.commit()
+
+    def lookup(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._is_expired(entry[0], now):
+                    self._memory.move_to_end(key)
+                    self._metrics["memory_hits"] += 1
+
+                    return entry[1]
+
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT created_at, value FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if not self._is_expired(row[0], now):
+                        self._set_in_memory(key, row[0], row[1])
+                        self._metrics["disk_hits"] += 1
+
+                        return row[1]
+
+                    self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self._metrics["misses"] += 1
+
+        return None
+
+    def update(self, key: str, value: str) -> None:
+        created_at = time.time()
+        with self._lock:
+            self._set_in_memory(key, created_at, value)
+
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created_at) "
+                    "VALUES (?, ?, ?)",
+                    (key, value, created_at),
+                )
+                self._db.commit()
+
+                if created_at - self._last_purge_at >= self.purge_interval_seconds:
+                    self._purge_expired(created_at)
+
+    def purge_expired(self) -> int:
+        """Delete the expired rows of the SQLite table and return their number."""
+
+        with self._lock:
+            if self._db is None:
+                return 0
+
+            return self._purge_expired(time.time())
+
+    def metrics(self) -> dict:
+        with self._lock:
+            hits = self._metrics["memory_hits"] + self._metrics["disk_hits"]
+            total = hits + self._metrics["misses"]
+
+            return {
+                **self._metrics,
+                "hit_ratio": hits / total if total else 0.0,
+                "size": len(self._memory),
+            }
+
+    def _set_in_memory(self, key: str, created_at: float, value: str) -> None:
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def _purge_expired(self, now: float) -> int:
+        cursor = self._db.execute(
+            "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+        )
+        self._db.commit()
+        self._last_purge_at = now
+        self._metrics["purged"] += cursor.rowcount
+
+        return cursor.rowcount
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return now - created_at > self.ttl_seconds
+
+
+def build_cache_key(prompt: str, model_id: str, temperature: float) -> str:
+    # Whitespace is normalized so reformatted but identical prompts share an entry.
+    normalized_prompt = " ".join(prompt.split())
+    raw_key = json.dumps([normalized_prompt, model_id, temperature])
+
+    return hashlib.sha256(raw_key.encode()).hexdigest()
+
+
+_llm_cache: BaseLLMCache | None = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> BaseLLMCache | None:
+    """Return the process-wide LLM cache, or None if caching is disabled."""
+
+    global _llm_cache
+
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMResponseCache()
+
+    return _llm_cache
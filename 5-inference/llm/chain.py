@@ -1,10 +1,55 @@
 from langchain.chains.llm import LLMChain
 from langchain.prompts import PromptTemplate
 
+from config import settings
+from llm.cache import BaseLLMCache, build_cache_key, get_llm_cache
+
+
+class CachedChain:
+    """
+    Wraps an LLMChain and serves its responses from a cache keyed on the rendered
+    prompt, the model id and the temperature.
+    """
+
+    def __init__(self, chain: LLMChain, cache: BaseLLMCache) -> None:
+        self.chain = chain
+        self.cache = cache
+
+    def invoke(self, inputs: dict) -> dict:
+        llm = self.chain.llm
+        temperature = getattr(llm, "temperature", None)
+        if settings.LLM_CACHE_DETERMINISTIC_ONLY and temperature != 0:
+            return self.chain.invoke(inputs)
+
+        prompt = self.chain.prompt.format(**inputs)
+        model_id = getattr(llm, "model_name", type(llm).__name__)
+        key = build_cache_key(prompt, model_id=model_id, temperature=temperature)
+
+        output = self.cache.lookup(key)
+        if output is None:
+            response = self.chain.invoke(inputs)
+            self.cache.update(key, response[self.chain.output_key])
+
+            return response
+
+        return {**inputs, self.chain.output_key: output}
+
 
 class GeneralChain:
     @staticmethod
-    def get_chain(llm, template: PromptTemplate, output_key: str, verbose=True):
-        return LLMChain(
+    def get_chain(
+        llm,
+        template: PromptTemplate,
+        output_key: str,
+        verbose=True,
+        cache: BaseLLMCache | None = None,
+    ):
+        chain = LLMChain(
             llm=llm, prompt=template, output_key=output_key, verbose=verbose
         )
+
+        cache = cache or get_llm_cache()
+        if cache is None:
+            return chain
+
+        return CachedChain(chain=chain, cache=cache)
@@ -0,0 +1,67 @@
+import json
+import threading
+import time
+from typing import Iterator
+
+
+class FakeRealTimeClient:
+    """
+    Local stand-in for the Qwak RealTimeClient, used to run and test the inference
+    pipeline without a deployed model. It answers every instruction row of the request
+    and records the size of each batch it receives.
+    """
+
+    def __init__(self, latency_seconds: float = 0.0) -> None:
+        self.latency_seconds = latency_seconds
+        self.batch_sizes: list[int] = []
+        self._lock = threading.Lock()
+
+    def predict(self, input_: str) -> list[dict]:
+        instructions = self._parse_instructions(input_)
+        with self._lock:
+            self.batch_sizes.append(len(instructions))
+
+        time.sleep(self.latency_seconds)
+
+        # One {"content": answer} record per instruction, for the DataFrame built by
+        # CopywriterMistralModel.predict. See `parse_predictions` for the real shape.
+        return [
+            {"content": f"Answer to: {instruction}"} for instruction in instructions
+        ]
+
+    def predict_stream(self, input_: str) -> Iterator[str]:
+        instruction = self._parse_instructions(input_)[0]
+        answer = f"Answer to: {instruction}"
+        for token in answer.split(" "):
+            time.sleep(self.latency_seconds)
+
+            yield f"{token} "
+
+    @staticmethod
+    def _parse_instructions(input_: str) -> list[str]:
+        # `input_` is a DataFrame serialized with `to_json()`: {"instruction": {row: text}}
+        return list(json.loads(input_)["instruction"].values())
+
+
+def parse_predictions(response: list[dict], num_instructions: int) -> list[str]:
+    """
+    Read one answer per instruction from the records returned by the model endpoint.
+
+    The original pipeline read a single answer as `response[0]["content"][0]`, i.e. it
+    assumed the content of a record to be a list holding the answer. No recorded
+    response of the deployed endpoint confirms whether it is list-wrapped or a plain
+    string as returned by `FakeRealTimeClient`, so both are accepted. A batched request
+    is assumed to return one record per instruction, in order.
+    """
+
+    if len(response) != num_instructions:
+        raise ValueError(
+            f"Expected {num_instructions} predictions, got {len(response)} records."
+        )
+
+    answers = []
+    for row in response:
+        content = row["content"]
+        answers.append(content[0] if isinstance(content, list) else content)
+
+    return answers
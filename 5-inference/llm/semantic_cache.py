@@ -0,0 +1,120 @@
+import threading
+import time
+
+import numpy as np
+
+from config import settings
+
+
+class SemanticAnswerCache:
+    """
+    Cache of generated answers looked up by query similarity instead of exact match.
+    The normalized embeddings of the recent queries live in one preallocated matrix, so
+    a lookup is a single matrix-vector product over at most `max_size` rows. A cached
+    answer is only returned for the same author_id and when the cosine similarity is at
+    least `threshold`. Entries expire after `ttl_seconds` and the least recently used
+    entry is evicted when the cache is full.
+    """
+
+    def __init__(
+        self,
+        dim: int = settings.EMBEDDING_SIZE,
+        threshold: float = settings.SEMANTIC_CACHE_THRESHOLD,
+        max_size: int = settings.SEMANTIC_CACHE_MAX_SIZE,
+        ttl_seconds: float = settings.SEMANTIC_CACHE_TTL_SECONDS,
+    ) -> None:
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+
+        self._vectors = np.zeros((max_size, dim), dtype=np.float32)
+        self._author_ids = np.full(max_size, None, dtype=object)
+        self._answers: list[str | None] = [None] * max_size
+        self._created_at = np.zeros(max_size, dtype=np.float64)
+        # A tick of 0 marks a free slot, otherwise it is when the slot was last used.
+        self._ticks = np.zeros(max_size, dtype=np.int64)
+        self._tick = 0
+        self._lock = threading.Lock()
+        self._metrics = {"hits": 0, "misses": 0}
+
+    def lookup(self, query_embedding: np.ndarray, author_id: str | None) -> str | None:
+        query_vector = self._normalize(query_embedding)
+        now = time.time()
+        with self._lock:
+            valid = (
+                (self._ticks > 0)
+                & (self._author_ids == author_id)
+                & (now - self._created_at <= self.ttl_seconds)
+            )
+            if not valid.any():
+                self._metrics["misses"] += 1
+
+                return None
+
+            similarities = np.where(valid, self._vectors @ query_vector, -np.inf)
+            best_index = int(np.argmax(similarities))
+            if similarities[best_index] < self.threshold:
+                self._metrics["misses"] += 1
+
+                return None
+
+            self._tick += 1
+            self._ticks[best_index] = self._tick
+            self._metrics["hits"] += 1
+
+            return self._answers[best_index]
+
+    def has_candidates(self, query_embedding: np.ndarray) -> bool:
+        """
+        Check if a query of any author is similar enough to be a hit, so the author_id
+        only needs to be resolved when a lookup can succeed. A query without any
+        candidate is counted as a miss.
+        """
+
+        query_vector = self._normalize(query_embedding)
+        now = time.time()
+        with self._lock:
+            valid = (self._ticks > 0) & (now - self._created_at <= self.ttl_seconds)
+            if valid.any():
+                best_similarity = (self._vectors[valid] @ query_vector).max()
+                if best_similarity >= self.threshold:
+                    return True
+
+            self._metrics["misses"] += 1
+
+            return False
+
+    def update(
+        self, query_embedding: np.ndarray, author_id: str | None, answer: str
+    ) -> None:
+        query_vector = self._normalize(query_embedding)
+        now = time.time()
+        with self._lock:
+            # Expired entries are freed first, so they are reused before live ones.
+            expired = (self._ticks > 0) & (now - self._created_at > self.ttl_seconds)
+            self._ticks[expired] = 0
+
+            index = int(np.argmin(self._ticks))
+            self._tick += 1
+            self._vectors[index] = query_vector
+            self._author_ids[index] = author_id
+            self._answers[index] = answer
+            self._created_at[index] = now
+            self._ticks[index] = self._tick
+
+    def metrics(self) -> dict:
+        with self._lock:
+            total = self._metrics["hits"] + self._metrics["misses"]
+
+            return {
+                **self._metrics,
+                "hit_ratio": self._metrics["hits"] / total if total else 0.0,
+                "size": int((self._ticks > 0).sum()),
+            }
+
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+
+        return vector / norm if norm > 0 else vector
@@ -19,6 +19,7 @@ if __name__ == "__main__":
         enable_rag=False,
         enable_evaluation=True,
         enable_monitoring=True,
+        defer_evaluation=False,
     )
 
     logger.info(f"Answer: {response['answer']}")
@@ -1,3 +1,4 @@
 from .prompt_monitoring import PromptMonitoringManager
+from .sinks import CometMonitoringSink, JSONLMonitoringSink
 
-__all__ = ["PromptMonitoringManager"]
+__all__ = ["PromptMonitoringManager", "CometMonitoringSink", "JSONLMonitoringSink"]
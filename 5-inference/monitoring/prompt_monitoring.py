@@ -1,55 +1,152 @@
-import comet_llm
+import atexit
+import queue
+import random
+import threading
+import time
+
+import core.logger_utils as logger_utils
 
 from config import settings
+from monitoring.sinks import BaseMonitoringSink, get_monitoring_sink
+
+logger = logger_utils.get_logger(__name__)
 
 
 class PromptMonitoringManager:
-    @classmethod
+    """
+    Logs prompts and chains without blocking the request path. Events are pushed onto a
+    bounded in-process queue and a background thread writes them to the sink in batches.
+    When the queue is full new events are dropped, and `sample_rate` can be lowered to
+    monitor only a fraction of the traffic. Pending events are flushed on shutdown.
+    """
+
+    def __init__(
+        self,
+        sink: BaseMonitoringSink | None = None,
+        max_queue_size: int = settings.MONITORING_QUEUE_MAX_SIZE,
+        batch_size: int = settings.MONITORING_BATCH_SIZE,
+        flush_interval_seconds: float = settings.MONITORING_FLUSH_INTERVAL_SECONDS,
+        sample_rate: float = settings.MONITORING_SAMPLE_RATE,
+    ) -> None:
+        self.sink = sink or get_monitoring_sink()
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.sample_rate = sample_rate
+        self._queue: queue.Queue[dict | None] = queue.Queue(maxsize=max_queue_size)
+        self._metrics = {"enqueued": 0, "dropped": 0, "sampled_out": 0, "written": 0}
+        self._metrics_lock = threading.Lock()
+        self._closed = threading.Event()
+
+        self._worker = threading.Thread(
+            target=self._run, name="prompt-monitoring", daemon=True
+        )
+        self._worker.start()
+        atexit.register(self.close)
+
     def log(
-        cls,
+        self,
         prompt: str,
         output: str,
         prompt_template: str | None = None,
         prompt_template_variables: dict | None = None,
         metadata: dict | None = None,
     ) -> None:
-        comet_llm.init()
-
         metadata = metadata or {}
         metadata = {
             "model": settings.MODEL_TYPE,
             **metadata,
         }
 
-        comet_llm.log_prompt(
-            workspace=settings.COMET_WORKSPACE,
-            project=f"{settings.COMET_PROJECT}-monitoring",
-            api_key=settings.COMET_API_KEY,
-            prompt=prompt,
-            prompt_template=prompt_template,
-            prompt_template_variables=prompt_template_variables,
-            output=output,
-            metadata=metadata,
+        self._enqueue(
+            "prompt",
+            {
+                "prompt": prompt,
+                "output": output,
+                "prompt_template": prompt_template,
+                "prompt_template_variables": prompt_template_variables,
+                "metadata": metadata,
+            },
         )
 
-    @classmethod
-    def log_chain(cls, query: str, response: str, eval_output: str):
-        comet_llm.init(project=f"{settings.COMET_PROJECT}-monitoring")
-        comet_llm.start_chain(
-            inputs={"user_query": query},
-            project=f"{settings.COMET_PROJECT}-monitoring",
-            api_key=settings.COMET_API_KEY,
-            workspace=settings.COMET_WORKSPACE,
+    def log_chain(self, query: str, response: str, eval_output: str) -> None:
+        self._enqueue(
+            "chain", {"query": query, "response": response, "eval_output": eval_output}
         )
-        with comet_llm.Span(
-            category="twin_response",
-            inputs={"user_query": query},
-        ) as span:
-            span.set_outputs(outputs=response)
-
-        with comet_llm.Span(
-            category="gpt3.5-eval",
-            inputs={"eval_result": eval_output},
-        ) as span:
-            span.set_outputs(outputs=response)
-        comet_llm.end_chain(outputs={"response": response, "eval_output": eval_output})
+
+    def metrics(self) -> dict:
+        with self._metrics_lock:
+            return {**self._metrics, "queue_size": self._queue.qsize()}
+
+    def close(self, timeout: float | None = None) -> None:
+        """Stop accepting events and flush the pending ones to the sink."""
+
+        if self._closed.is_set():
+            return
+
+        self._closed.set()
+        try:
+            # Wakes the worker up if it is waiting on an empty queue. When the queue is
+            # full the worker is busy anyway.
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._worker.join(timeout=timeout)
+        self.sink.close()
+
+    def _enqueue(self, event_type: str, data: dict) -> None:
+        if self._closed.is_set():
+            self._increment("dropped")
+
+            return
+
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            self._increment("sampled_out")
+
+            return
+
+        event = {"type": event_type, "timestamp": time.time(), "data": data}
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self._increment("dropped")
+        else:
+            self._increment("enqueued")
+
+    def _run(self) -> None:
+        while not (self._closed.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+
+    def _next_batch(self) -> list[dict]:
+        batch = []
+        deadline = time.monotonic() + self.flush_interval_seconds
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            try:
+                event = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+
+            if event is not None:
+                batch.append(event)
+
+            if self._closed.is_set() and self._queue.empty():
+                break
+
+        return batch
+
+    def _write(self, batch: list[dict]) -> None:
+        try:
+            self.sink.write(batch)
+        except Exception:
+            logger.exception("Failed to write monitoring events.", num_events=len(batch))
+        else:
+            self._increment("written", len(batch))
+
+    def _increment(self, metric: str, value: int = 1) -> None:
+        with self._metrics_lock:
+            self._metrics[metric] += value
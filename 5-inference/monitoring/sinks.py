@@ -0,0 +1,105 @@
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+
+import comet_llm
+
+from config import settings
+
+
+class BaseMonitoringSink(ABC):
+    """
+    Abstract class for all the destinations of the prompt monitoring events.
+    """
+
+    @abstractmethod
+    def write(self, events: list[dict]) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class CometMonitoringSink(BaseMonitoringSink):
+    def __init__(self) -> None:
+        self.project = f"{settings.COMET_PROJECT}-monitoring"
+
+        comet_llm.init(project=self.project)
+
+    def write(self, events: list[dict]) -> None:
+        for event in events:
+            if event["type"] == "prompt":
+                self._log_prompt(**event["data"])
+            elif event["type"] == "chain":
+                self._log_chain(**event["data"])
+            else:
+                raise ValueError(f"Unsupported monitoring event type: {event['type']}")
+
+    def _log_prompt(
+        self,
+        prompt: str,
+        output: str,
+        prompt_template: str | None = None,
+        prompt_template_variables: dict | None = None,
+        metadata: dict | None = None,
+    ) -> None:
+        comet_llm.log_prompt(
+            workspace=settings.COMET_WORKSPACE,
+            project=self.project,
+            api_key=settings.COMET_API_KEY,
+            prompt=prompt,
+            prompt_template=prompt_template,
+            prompt_template_variables=prompt_template_variables,
+            output=output,
+            metadata=metadata,
+        )
+
+    def _log_chain(self, query: str, response: str, eval_output: str) -> None:
+        comet_llm.start_chain(
+            inputs={"user_query": query},
+            project=self.project,
+            api_key=settings.COMET_API_KEY,
+            workspace=settings.COMET_WORKSPACE,
+        )
+        with comet_llm.Span(
+            category="twin_response",
+            inputs={"user_query": query},
+        ) as span:
+            span.set_outputs(outputs=response)
+
+        with comet_llm.Span(
+            category="gpt3.5-eval",
+            inputs={"eval_result": eval_output},
+        ) as span:
+            span.set_outputs(outputs=response)
+        comet_llm.end_chain(outputs={"response": response, "eval_output": eval_output})
+
+
+class JSONLMonitoringSink(BaseMonitoringSink):
+    """
+    Appends every monitoring event as one JSON line to a local file.
+    Useful for tests and offline runs.
+    """
+
+    def __init__(self, path: str = settings.MONITORING_JSONL_PATH) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, events: list[dict]) -> None:
+        with self._lock, open(self.path, "a") as file:
+            for event in events:
+                file.write(json.dumps(event, default=str) + "\n")
+
+
+def get_monitoring_sink() -> BaseMonitoringSink:
+    if settings.MONITORING_SINK == "comet":
+        return CometMonitoringSink()
+    elif settings.MONITORING_SINK == "jsonl":
+        return JSONLMonitoringSink()
+    else:
+        raise ValueError(f"Unsupported monitoring sink: {settings.MONITORING_SINK}")
@@ -0,0 +1,102 @@
+import functools
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from transformers import AutoTokenizer
+
+from config import settings
+
+SENTENCE_BOUNDARY_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+
+@functools.lru_cache(maxsize=None)
+def get_tokenizer(model_id: str):
+    return AutoTokenizer.from_pretrained(
+        model_id, token=settings.HUGGINGFACE_ACCESS_TOKEN
+    )
+
+
+class ContextPacker:
+    """
+    Packs the reranked passages into a fixed token budget before they are formatted into
+    the prompt. Passages are added greedily in rerank order. A passage that does not fit
+    is truncated to its leading sentences that do, or skipped if none does, and the next
+    passages still fill the budget left. Token lengths are cached per chunk_id, so a
+    passage that was already packed is never tokenized again.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = settings.CONTEXT_MAX_TOKENS,
+        model_id: str = settings.MODEL_TYPE,
+        cache_max_size: int = settings.CONTEXT_TOKEN_CACHE_MAX_SIZE,
+    ) -> None:
+        self.max_tokens = max_tokens
+        self.model_id = model_id
+        self.cache_max_size = cache_max_size
+        self._sentence_lengths: OrderedDict[str, tuple[list[str], list[int]]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def pack(self, passages: list[str]) -> list[str]:
+        packed_passages = []
+        remaining_tokens = self.max_tokens
+        for passage in passages:
+            if remaining_tokens <= 0:
+                break
+
+            sentences, lengths = self._get_sentence_lengths(passage)
+            num_tokens = sum(lengths)
+            if num_tokens <= remaining_tokens:
+                packed_passages.append(passage)
+                remaining_tokens -= num_tokens
+
+                continue
+
+            truncated_sentences = []
+            for sentence, length in zip(sentences, lengths):
+                if length > remaining_tokens:
+                    break
+
+                truncated_sentences.append(sentence)
+                remaining_tokens -= length
+
+            if truncated_sentences:
+                packed_passages.append(" ".join(truncated_sentences))
+
+        return packed_passages
+
+    def count_tokens(self, passage: str) -> int:
+        return sum(self._get_sentence_lengths(passage)[1])
+
+    def _get_sentence_lengths(self, passage: str) -> tuple[list[str], list[int]]:
+        # The chunk_id of a passage is the md5 of its content.
+        chunk_id = hashlib.md5(passage.encode()).hexdigest()
+        with self._lock:
+            if chunk_id in self._sentence_lengths:
+                self._sentence_lengths.move_to_end(chunk_id)
+
+                return self._sentence_lengths[chunk_id]
+
+        sentences = [
+            sentence
+            for sentence in SENTENCE_BOUNDARY_PATTERN.split(passage.strip())
+            if sentence
+        ]
+        if sentences:
+            input_ids = get_tokenizer(self.model_id)(
+                sentences, add_special_tokens=False
+            )["input_ids"]
+            lengths = [len(sentence_ids) for sentence_ids in input_ids]
+        else:
+            lengths = []
+
+        with self._lock:
+            self._sentence_lengths[chunk_id] = (sentences, lengths)
+            while len(self._sentence_lengths) > self.cache_max_size:
+                self._sentence_lengths.popitem(last=False)
+
+        return sentences, lengths
@@ -0,0 +1,61 @@
+import numpy as np
+from qdrant_client.http.models import ScoredPoint
+
+
+def fuse_hits(
+    hits_per_query: list[list[ScoredPoint]],
+    method: str = "rrf",
+    rrf_k: int = 60,
+    max_candidates: int | None = None,
+) -> list[ScoredPoint]:
+    """
+    De-duplicate the hits of several queries by point id (the point id of a vector
+    collection is the chunk_id) and combine their per-query ranks into a single ranking.
+
+    Args:
+        hits_per_query: One list of hits per query, each sorted by descending score.
+        method: "rrf" for reciprocal rank fusion or "max" to keep the best score of every chunk.
+        rrf_k: Smoothing constant of the reciprocal rank fusion.
+        max_candidates: Maximum number of fused hits to return.
+
+    Returns:
+        The unique hits sorted by their fused score. Each chunk is represented by its
+        highest-scoring hit, with `score` replaced by the fused score.
+    """
+
+    ids, scores, ranks = [], [], []
+    hits = []
+    for query_hits in hits_per_query:
+        for rank, hit in enumerate(query_hits):
+            ids.append(str(hit.id))
+            scores.append(hit.score)
+            ranks.append(rank)
+            hits.append(hit)
+
+    if not hits:
+        return []
+
+    scores = np.asarray(scores, dtype=np.float64)
+    ranks = np.asarray(ranks, dtype=np.float64)
+    unique_ids, inverse = np.unique(np.asarray(ids), return_inverse=True)
+
+    if method == "rrf":
+        fused_scores = np.zeros(len(unique_ids), dtype=np.float64)
+        np.add.at(fused_scores, inverse, 1.0 / (rrf_k + ranks + 1))
+    elif method == "max":
+        fused_scores = np.full(len(unique_ids), -np.inf, dtype=np.float64)
+        np.maximum.at(fused_scores, inverse, scores)
+    else:
+        raise ValueError(f"Unsupported fusion method: {method}")
+
+    # Pick the highest-scoring hit of every chunk: sort by (chunk, -score) and take
+    # the first occurrence of each chunk.
+    order = np.lexsort((-scores, inverse))
+    first_occurrences = order[np.unique(inverse[order], return_index=True)[1]]
+
+    fused_order = np.argsort(-fused_scores, kind="stable")[:max_candidates]
+
+    return [
+        hits[first_occurrences[i]].model_copy(update={"score": float(fused_scores[i])})
+        for i in fused_order
+    ]
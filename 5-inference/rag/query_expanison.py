@@ -1,23 +1,24 @@
 from langchain_openai import ChatOpenAI
 
-from llm_components.chain import GeneralChain
-from llm_components.prompt_templates import QueryExpansionTemplate
+from llm.chain import GeneralChain
+from llm.prompt_templates import QueryExpansionTemplate
 from config import settings
 
 
 class QueryExpansion:
-    @staticmethod
-    def generate_response(query: str, to_expand_to_n: int) -> list[str]:
-        query_expansion_template = QueryExpansionTemplate()
-        prompt_template = query_expansion_template.create_template(to_expand_to_n)
-        model = ChatOpenAI(
+    def __init__(self) -> None:
+        self._model = ChatOpenAI(
             model=settings.OPENAI_MODEL_ID,
             api_key=settings.OPENAI_API_KEY,
             temperature=0,
         )
 
+    def generate_response(self, query: str, to_expand_to_n: int) -> list[str]:
+        query_expansion_template = QueryExpansionTemplate()
+        prompt_template = query_expansion_template.create_template(to_expand_to_n)
+
         chain = GeneralChain().get_chain(
-            llm=model, output_key="expanded_queries", template=prompt_template
+            llm=self._model, output_key="expanded_queries", template=prompt_template
         )
 
         response = chain.invoke({"question": query})
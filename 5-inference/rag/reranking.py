@@ -1,21 +1,31 @@
+import os
+
+import numpy as np
+import torch
 from langchain_openai import ChatOpenAI
-from llm_components.chain import GeneralChain
-from llm_components.prompt_templates import RerankingTemplate
+from llm.chain import GeneralChain
+from llm.prompt_templates import RerankingTemplate
+from sentence_transformers import CrossEncoder
+from transformers import AutoTokenizer
 
 from config import settings
 
 
 class Reranker:
-    @staticmethod
+    def __init__(self) -> None:
+        self._model = ChatOpenAI(
+            model=settings.OPENAI_MODEL_ID,
+            api_key=settings.OPENAI_API_KEY,
+        )
+
     def generate_response(
-        query: str, passages: list[str], keep_top_k: int
+        self, query: str, passages: list[str], keep_top_k: int
     ) -> list[str]:
         reranking_template = RerankingTemplate()
         prompt_template = reranking_template.create_template(keep_top_k=keep_top_k)
 
-        model = ChatOpenAI(model=settings.OPENAI_MODEL_ID, api_key=settings.OPENAI_API_KEY)
         chain = GeneralChain().get_chain(
-            llm=model, output_key="rerank", template=prompt_template
+            llm=self._model, output_key="rerank", template=prompt_template
         )
 
         stripped_passages = [
@@ -32,4 +42,133 @@ class Reranker:
             if (stripped_item := item.strip())
         ]
 
-        return stripped_passages
+        return stripped_passages[:keep_top_k]
+
+    def rerank_with_scores(
+        self, query: str, passages: list[str], keep_top_k: int
+    ) -> list[tuple[str, float]]:
+        # The LLM only returns an order, so the score is the reciprocal rank.
+        reranked_passages = self.generate_response(query, passages, keep_top_k)
+
+        return [
+            (passage, 1.0 / rank)
+            for rank, passage in enumerate(reranked_passages, start=1)
+        ]
+
+
+class CrossEncoderReranker:
+    """
+    Local reranker that scores (query, passage) pairs in batches with a cross-encoder.
+    The model can optionally be exported to ONNX and/or quantized to int8 to run faster on CPU.
+    """
+
+    def __init__(
+        self,
+        model_id: str = settings.RERANKER_CROSS_ENCODER_MODEL_ID,
+        batch_size: int = settings.RERANKER_BATCH_SIZE,
+        use_onnx: bool = settings.RERANKER_USE_ONNX,
+        quantize: bool = settings.RERANKER_QUANTIZE,
+    ) -> None:
+        self.batch_size = batch_size
+        self._model = None
+        self._onnx_model = None
+        self._tokenizer = None
+
+        if use_onnx:
+            # Only the tokenizer is needed next to the ONNX session, so the PyTorch
+            # weights are never loaded.
+            self._tokenizer = AutoTokenizer.from_pretrained(model_id)
+            self._onnx_model = self._load_onnx_model(model_id, quantize=quantize)
+        else:
+            self._model = CrossEncoder(model_id, device=settings.EMBEDDING_MODEL_DEVICE)
+            if quantize:
+                self._model.model = torch.quantization.quantize_dynamic(
+                    self._model.model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+
+    @staticmethod
+    def _load_onnx_model(model_id: str, quantize: bool):
+        # optimum is only needed for the ONNX backend, so it is imported lazily.
+        from optimum.onnxruntime import (
+            ORTModelForSequenceClassification,
+            ORTQuantizer,
+        )
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+        # The quantized and the full precision exports are kept apart, so switching
+        # the flag never loads a stale export.
+        export_name = model_id.replace("/", "--") + ("-int8" if quantize else "")
+        export_dir = os.path.join(settings.RERANKER_ONNX_EXPORT_DIR, export_name)
+        if not os.path.exists(export_dir):
+            onnx_model = ORTModelForSequenceClassification.from_pretrained(
+                model_id, export=True
+            )
+            onnx_model.save_pretrained(export_dir)
+
+            if quantize:
+                quantizer = ORTQuantizer.from_pretrained(onnx_model)
+                quantizer.quantize(
+                    save_dir=export_dir,
+                    quantization_config=AutoQuantizationConfig.avx2(
+                        is_static=False, per_channel=False
+                    ),
+                )
+
+        file_name = "model_quantized.onnx" if quantize else "model.onnx"
+
+        return ORTModelForSequenceClassification.from_pretrained(
+            export_dir, file_name=file_name
+        )
+
+    def score(self, query: str, passages: list[str]) -> np.ndarray:
+        pairs = [[query, passage] for passage in passages]
+        if not pairs:
+            return np.array([], dtype=np.float32)
+
+        if self._onnx_model is None:
+            return self._model.predict(
+                pairs, batch_size=self.batch_size, convert_to_numpy=True
+            )
+
+        scores = []
+        for i in range(0, len(pairs), self.batch_size):
+            features = self._tokenizer(
+                pairs[i : i + self.batch_size],
+                padding=True,
+                truncation=True,
+                return_tensors="pt",
+            )
+            logits = self._onnx_model(**features).logits
+            # CrossEncoder.predict applies a sigmoid to single-label logits, so both
+            # backends return scores on the same scale.
+            scores.append(torch.sigmoid(logits[:, 0]).detach().numpy())
+
+        return np.concatenate(scores)
+
+    def rerank_with_scores(
+        self, query: str, passages: list[str], keep_top_k: int
+    ) -> list[tuple[str, float]]:
+        stripped_passages = [
+            stripped_item for item in passages if (stripped_item := item.strip())
+        ]
+        scores = self.score(query, stripped_passages)
+        top_k_indices = np.argsort(-scores, kind="stable")[:keep_top_k]
+
+        return [(stripped_passages[i], float(scores[i])) for i in top_k_indices]
+
+    def generate_response(
+        self, query: str, passages: list[str], keep_top_k: int
+    ) -> list[str]:
+        return [
+            passage
+            for passage, _ in self.rerank_with_scores(query, passages, keep_top_k)
+        ]
+
+
+def get_reranker() -> Reranker | CrossEncoderReranker:
+    if settings.RERANKER_BACKEND == "openai":
+        return Reranker()
+    elif settings.RERANKER_BACKEND == "cross-encoder":
+        return CrossEncoderReranker()
+    else:
+        raise ValueError(f"Unsupported reranker backend: {settings.RERANKER_BACKEND}")
@@ -1,13 +1,15 @@
 import concurrent.futures
 
 import core.logger_utils as logger_utils
+import numpy as np
 from core.db.qdrant import QdrantDatabaseConnector
 from qdrant_client import models
 from sentence_transformers.SentenceTransformer import SentenceTransformer
 
 import utils
+from rag.fusion import fuse_hits
 from rag.query_expanison import QueryExpansion
-from rag.reranking import Reranker
+from rag.reranking import get_reranker
 from rag.self_query import SelfQuery
 from config import settings
 
@@ -17,112 +19,217 @@ logger = logger_utils.get_logger(__name__)
 class VectorRetriever:
     """
     Class for retrieving vectors from a Vector store in a RAG system using query expansion and Multitenancy search.
+    It holds no per-query state, so one long-lived instance (with its preloaded embedder,
+    pooled Qdrant client and LLM clients) can serve concurrent requests.
     """
 
-    def __init__(self, query: str) -> None:
+    def __init__(self) -> None:
         self._client = QdrantDatabaseConnector()
-        self.query = query
-        self._embedder = SentenceTransformer(settings.EMBEDDING_MODEL_ID)
+        self._embedder = SentenceTransformer(
+            settings.EMBEDDING_MODEL_ID, device=settings.EMBEDDING_MODEL_DEVICE
+        )
         self._query_expander = QueryExpansion()
         self._metadata_extractor = SelfQuery()
-        self._reranker = Reranker()
+        self._reranker = get_reranker()
+
+    def embed_query(self, query: str) -> np.ndarray:
+        return self._embedder.encode(query)
+
+    def extract_author_id(self, query: str) -> str | None:
+        return self._metadata_extractor.generate_response(query)
+
+    _COLLECTIONS = [
+        ("vector_posts", "author_id"),
+        ("vector_articles", "author_id"),
+        ("vector_repositories", "owner_id"),
+    ]
+
+    def _search(
+        self, generated_queries: list[str], metadata_filter_value: str | None, k: int
+    ) -> list[list]:
+        return self._merge_collections(
+            self._search_collections(
+                generated_queries, metadata_filter_value, limit=k // 3
+            )
+        )
 
-    def _search_single_query(
-        self, generated_query: str, metadata_filter_value: str, k: int
-    ):
-        assert k > 3, "k should be greater than 3"
+    def _search_collections(
+        self,
+        generated_queries: list[str],
+        metadata_filter_value: str | None,
+        limit: int,
+    ) -> list[list[list]]:
+        # Embed all the expanded queries at once and search them with one batched
+        # request per collection.
+        query_vectors = self._embedder.encode(generated_queries).tolist()
+
+        with concurrent.futures.ThreadPoolExecutor() as executor:
+            search_tasks = [
+                executor.submit(
+                    self._client.search_batch,
+                    collection_name=collection_name,
+                    query_vectors=query_vectors,
+                    query_filter=self._build_filter(
+                        filter_key, metadata_filter_value
+                    ),
+                    limit=limit,
+                )
+                for collection_name, filter_key in self._COLLECTIONS
+            ]
+
+            return [task.result() for task in search_tasks]
+
+    @classmethod
+    def _filter_collections(
+        cls, hits_per_collection: list[list[list]], value: str | None, limit: int
+    ) -> list[list[list]]:
+        """Keep the best `limit` hits of every query whose owner matches the value."""
+
+        return [
+            [
+                [
+                    hit
+                    for hit in query_hits
+                    if not value or hit.payload.get(filter_key) == value
+                ][:limit]
+                for query_hits in collection_hits
+            ]
+            for (_, filter_key), collection_hits in zip(
+                cls._COLLECTIONS, hits_per_collection
+            )
+        ]
 
-        query_vector = self._embedder.encode(generated_query).tolist()
-
-        vectors = [
-            self._client.search(
-                collection_name="vector_posts",
-                query_filter=models.Filter(
-                    must=[
-                        models.FieldCondition(
-                            key="author_id",
-                            match=models.MatchValue(
-                                value=metadata_filter_value,
-                            ),
-                        )
-                    ]
-                ),
-                query_vector=query_vector,
-                limit=k // 3,
-            ),
-            self._client.search(
-                collection_name="vector_articles",
-                query_filter=models.Filter(
-                    must=[
-                        models.FieldCondition(
-                            key="author_id",
-                            match=models.MatchValue(
-                                value=metadata_filter_value,
-                            ),
-                        )
-                    ]
-                ),
-                query_vector=query_vector,
-                limit=k // 3,
-            ),
-            self._client.search(
-                collection_name="vector_repositories",
-                query_filter=models.Filter(
-                    must=[
-                        models.FieldCondition(
-                            key="owner_id",
-                            match=models.MatchValue(
-                                value=metadata_filter_value,
-                            ),
-                        )
-                    ]
-                ),
-                query_vector=query_vector,
-                limit=k // 3,
-            ),
+    @staticmethod
+    def _merge_collections(hits_per_collection: list[list[list]]) -> list[list]:
+        # Merge the hits of every query across the collections, so each query gets
+        # a single ranking for the fusion step.
+        return [
+            sorted(
+                utils.flatten(query_hits), key=lambda hit: hit.score, reverse=True
+            )
+            for query_hits in zip(*hits_per_collection)
         ]
 
-        return utils.flatten(vectors)
+    @staticmethod
+    def _build_filter(key: str, value: str | None) -> models.Filter | None:
+        if not value:
+            return None
 
-    def retrieve_top_k(self, k: int, to_expand_to_n_queries: int) -> list:
-        generated_queries = self._query_expander.generate_response(
-            self.query, to_expand_to_n=to_expand_to_n_queries
-        )
-        logger.info(
-            "Successfully generated queries for search.",
-            num_queries=len(generated_queries),
+        return models.Filter(
+            must=[models.FieldCondition(key=key, match=models.MatchValue(value=value))]
         )
 
-        author_id = self._metadata_extractor.generate_response(self.query)
-        logger.info(
-            "Successfully extracted the author_id from the query.",
-            author_id=author_id,
+    def retrieve(
+        self,
+        query: str,
+        k: int,
+        n_expansions: int,
+        keep_top_k: int | None = None,
+        author_id: str | None = None,
+    ) -> tuple[list[str], str | None]:
+        """
+        Retrieve and rerank the passages for the query. The author_id is extracted from
+        the query unless it is given, and is returned with the passages.
+        """
+
+        hits, author_id = self.retrieve_top_k(
+            query, k=k, to_expand_to_n_queries=n_expansions, author_id=author_id
+        )
+        reranked_hits = self.rerank(
+            query, hits=hits, keep_top_k=keep_top_k or settings.KEEP_TOP_K
         )
 
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            search_tasks = [
-                executor.submit(self._search_single_query, query, author_id, k)
-                for query in generated_queries
-            ]
+        return [passage for passage, _ in reranked_hits], author_id
 
-            hits = [
-                task.result() for task in concurrent.futures.as_completed(search_tasks)
+    def retrieve_top_k(
+        self,
+        query: str,
+        k: int,
+        to_expand_to_n_queries: int,
+        author_id: str | None = None,
+    ) -> tuple[list, str | None]:
+        assert k > 3, "k should be greater than 3"
+
+        # The query expansion and the self-query are independent LLM round-trips, so
+        # they run together with the search of the original query. As the author_id
+        # is not known yet, the original query is searched without the author filter,
+        # fetching RAG_POST_FILTER_OVERFETCH times more hits, and the filter is applied
+        # to its hits once the self-query is done. The expanded queries need both
+        # LLM calls anyway, so they are filtered by Qdrant.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+            expansion_task = executor.submit(
+                self._query_expander.generate_response,
+                query,
+                to_expand_to_n=to_expand_to_n_queries,
+            )
+            if author_id is None:
+                author_id_task = executor.submit(
+                    self._metadata_extractor.generate_response, query
+                )
+                original_query_task = executor.submit(
+                    self._search_collections,
+                    [query],
+                    None,
+                    limit=(k // 3) * settings.RAG_POST_FILTER_OVERFETCH,
+                )
+                author_id = author_id_task.result()
+                logger.info(
+                    "Successfully extracted the author_id from the query.",
+                    author_id=author_id,
+                )
+            else:
+                original_query_task = executor.submit(
+                    self._search_collections, [query], author_id, limit=k // 3
+                )
+
+            generated_queries = [
+                generated_query
+                for generated_query in expansion_task.result()
+                if generated_query != query
             ]
-            hits = utils.flatten(hits)
+            logger.info(
+                "Successfully generated queries for search.",
+                num_queries=len(generated_queries),
+            )
+            expanded_hits = (
+                self._search(generated_queries, author_id, k)
+                if generated_queries
+                else []
+            )
+
+            original_hits = self._merge_collections(
+                self._filter_collections(
+                    original_query_task.result(), author_id, limit=k // 3
+                )
+            )
+            hits_per_query = original_hits + expanded_hits
+
+        # The same chunk is usually found by several expanded queries, so the hits are
+        # de-duplicated and their ranks fused before reranking.
+        hits = fuse_hits(
+            hits_per_query,
+            method=settings.RAG_FUSION_METHOD,
+            rrf_k=settings.RAG_FUSION_RRF_K,
+            max_candidates=settings.RAG_FUSION_MAX_CANDIDATES,
+        )
+        logger.info(
+            "All documents retrieved successfully.",
+            num_hits=sum(len(query_hits) for query_hits in hits_per_query),
+            num_documents=len(hits),
+        )
 
-        logger.info("All documents retrieved successfully.", num_documents=len(hits))
+        return hits, author_id
 
-        return hits
+    def rerank(
+        self, query: str, hits: list, keep_top_k: int
+    ) -> list[tuple[str, float]]:
+        """Rerank the hits into (passage, score) pairs, best first."""
 
-    def rerank(self, hits: list, keep_top_k: int) -> list[str]:
         content_list = [hit.payload["content"] for hit in hits]
-        rerank_hits = self._reranker.generate_response(
-            query=self.query, passages=content_list, keep_top_k=keep_top_k
+        rerank_hits = self._reranker.rerank_with_scores(
+            query=query, passages=content_list, keep_top_k=keep_top_k
         )
 
         logger.info("Documents reranked successfully.", num_documents=len(rerank_hits))
 
         return rerank_hits
-
-    def set_query(self, query: str):
-        self.query = query
@@ -1,22 +1,23 @@
 from langchain_openai import ChatOpenAI
 
-from llm_components.chain import GeneralChain
-from llm_components.prompt_templates import SelfQueryTemplate
+from llm.chain import GeneralChain
+from llm.prompt_templates import SelfQueryTemplate
 from config import settings
 
 
 class SelfQuery:
-    @staticmethod
-    def generate_response(query: str) -> str:
-        prompt = SelfQueryTemplate().create_template()
-        model = ChatOpenAI(
+    def __init__(self) -> None:
+        self._model = ChatOpenAI(
             model=settings.OPENAI_MODEL_ID,
             api_key=settings.OPENAI_API_KEY,
             temperature=0,
         )
 
+    def generate_response(self, query: str) -> str:
+        prompt = SelfQueryTemplate().create_template()
+
         chain = GeneralChain().get_chain(
-            llm=model, output_key="metadata_filter_value", template=prompt
+            llm=self._model, output_key="metadata_filter_value", template=prompt
         )
 
         response = chain.invoke({"question": query})
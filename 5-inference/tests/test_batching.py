@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+import pytest
+
+from llm.batching import MicroBatcher
+from llm.endpoints import FakeRealTimeClient, parse_predictions
+
+
+def build_predict_batch(client: FakeRealTimeClient):
+    def predict_batch(prompts: list[str]) -> list[str]:
+        input_ = json.dumps(
+            {"instruction": {str(i): prompt for i, prompt in enumerate(prompts)}}
+        )
+
+        return parse_predictions(client.predict(input_), num_instructions=len(prompts))
+
+    return predict_batch
+
+
+async def submit_all(batcher: MicroBatcher, prompts: list[str]) -> list[str]:
+    try:
+        return await asyncio.gather(*(batcher.submit(prompt) for prompt in prompts))
+    finally:
+        await batcher.close()
+
+
+def test_concurrent_prompts_are_sent_in_one_batch():
+    """Test that prompts arriving together are sent to the model as one request."""
+    client = FakeRealTimeClient()
+    batcher = MicroBatcher(
+        build_predict_batch(client), max_batch_size=8, max_wait_ms=50
+    )
+    prompts = [f"prompt {i}" for i in range(5)]
+
+    answers = asyncio.run(submit_all(batcher, prompts))
+
+    assert client.batch_sizes == [5]
+    assert answers == [f"Answer to: {prompt}" for prompt in prompts]
+
+
+def test_batches_are_capped_at_max_batch_size():
+    """Test that no request to the model has more than max_batch_size rows."""
+    client = FakeRealTimeClient()
+    batcher = MicroBatcher(
+        build_predict_batch(client), max_batch_size=4, max_wait_ms=50
+    )
+    prompts = [f"prompt {i}" for i in range(10)]
+
+    answers = asyncio.run(submit_all(batcher, prompts))
+
+    assert sorted(client.batch_sizes) == [2, 4, 4]
+    assert answers == [f"Answer to: {prompt}" for prompt in prompts]
+
+
+def test_model_errors_are_raised_to_every_caller():
+    """Test that a failed model call fails all the requests of its batch."""
+
+    def failing_predict_batch(prompts: list[str]) -> list[str]:
+        raise RuntimeError("model unavailable")
+
+    batcher = MicroBatcher(failing_predict_batch, max_batch_size=4, max_wait_ms=10)
+
+    with pytest.raises(RuntimeError, match="model unavailable"):
+        asyncio.run(submit_all(batcher, ["a", "b"]))
+
+
+def test_batcher_can_be_used_from_another_event_loop():
+    """Test that the batcher keeps working when it is used by a new event loop."""
+    client = FakeRealTimeClient()
+    batcher = MicroBatcher(
+        build_predict_batch(client), max_batch_size=4, max_wait_ms=10
+    )
+
+    first_answer = asyncio.run(batcher.submit("first"))
+    second_answer = asyncio.run(asyncio.wait_for(batcher.submit("second"), timeout=5))
+
+    assert first_answer == "Answer to: first"
+    assert second_answer == "Answer to: second"
+
+
+def test_close_sends_the_prompts_still_waiting():
+    """Test that closing the batcher answers the prompts that were not sent yet."""
+    client = FakeRealTimeClient()
+    batcher = MicroBatcher(
+        build_predict_batch(client), max_batch_size=2, max_wait_ms=10_000
+    )
+    prompts = [f"prompt {i}" for i in range(5)]
+
+    async def submit_and_close() -> list[str]:
+        tasks = [asyncio.create_task(batcher.submit(prompt)) for prompt in prompts]
+        # Two batches are sent right away; the worker is still collecting the third.
+        await asyncio.sleep(0.05)
+        await batcher.close()
+
+        return await asyncio.wait_for(asyncio.gather(*tasks), timeout=5)
+
+    answers = asyncio.run(submit_and_close())
+
+    assert answers == [f"Answer to: {prompt}" for prompt in prompts]
+    assert sorted(client.batch_sizes) == [1, 2, 2]
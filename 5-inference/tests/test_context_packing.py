@@ -0,0 +1,81 @@
+import pytest
+
+import rag.context_packing
+from rag.context_packing import ContextPacker
+
+
+class WhitespaceTokenizer:
+    """Tokenizer stub where every whitespace-separated word is one token."""
+
+    def __init__(self) -> None:
+        self.tokenized: list[str] = []
+
+    def __call__(self, sentences: list[str], add_special_tokens: bool = True) -> dict:
+        self.tokenized.extend(sentences)
+
+        return {"input_ids": [sentence.split() for sentence in sentences]}
+
+
+@pytest.fixture
+def tokenizer(monkeypatch):
+    """Fixture to count tokens by words instead of loading a Hugging Face tokenizer."""
+    tokenizer_instance = WhitespaceTokenizer()
+    monkeypatch.setattr(
+        rag.context_packing, "get_tokenizer", lambda model_id: tokenizer_instance
+    )
+
+    return tokenizer_instance
+
+
+def test_passages_are_packed_until_the_budget_is_full(tokenizer):
+    """Test that whole passages are added in order while they fit the budget."""
+    packer = ContextPacker(max_tokens=6)
+    passages = ["one two three.", "four five six.", "seven eight."]
+
+    assert packer.pack(passages) == ["one two three.", "four five six."]
+
+
+def test_overflowing_passage_is_truncated_at_a_sentence_boundary(tokenizer):
+    """Test that a passage that does not fit keeps its leading sentences that do."""
+    packer = ContextPacker(max_tokens=6)
+    passages = ["one two three.", "Four five. Six seven. Eight.", "nine ten."]
+
+    assert packer.pack(passages) == ["one two three.", "Four five."]
+
+
+def test_passages_after_an_overflowing_one_still_fill_the_budget(tokenizer):
+    """Test that the lower-ranked passages that fit are packed after a truncation."""
+    packer = ContextPacker(max_tokens=6)
+    passages = ["one two three.", "Four five. Six seven. Eight.", "nine.", "ten."]
+
+    assert packer.pack(passages) == ["one two three.", "Four five.", "nine."]
+
+
+def test_passage_without_a_fitting_sentence_is_skipped(tokenizer):
+    """Test that a passage whose first sentence does not fit is skipped."""
+    packer = ContextPacker(max_tokens=4)
+    passages = ["one two.", "three four five six.", "seven.", "eight nine."]
+
+    assert packer.pack(passages) == ["one two.", "seven."]
+
+
+def test_token_lengths_are_cached_per_chunk(tokenizer):
+    """Test that a passage is tokenized once and served from the cache afterwards."""
+    packer = ContextPacker(max_tokens=100)
+    passages = ["one two. three.", "four five."]
+
+    packer.pack(passages)
+    packer.pack(passages)
+
+    assert tokenizer.tokenized == ["one two.", "three.", "four five."]
+    assert packer.count_tokens("one two. three.") == 3
+
+
+def test_least_recently_used_chunk_is_evicted(tokenizer):
+    """Test that the cache keeps at most cache_max_size chunks."""
+    packer = ContextPacker(max_tokens=100, cache_max_size=2)
+
+    packer.pack(["one.", "two.", "three."])
+    packer.pack(["one."])
+
+    assert tokenizer.tokenized == ["one.", "two.", "three.", "one."]
@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+from llm.endpoints import FakeRealTimeClient, parse_predictions
+
+
+def test_plain_records_are_parsed():
+    """Test that one answer is read from every {"content": answer} record."""
+    client = FakeRealTimeClient()
+    input_ = json.dumps({"instruction": {"0": "first", "1": "second"}})
+
+    answers = parse_predictions(client.predict(input_), num_instructions=2)
+
+    assert answers == ["Answer to: first", "Answer to: second"]
+
+
+def test_list_wrapped_records_are_parsed():
+    """Test that a record whose content is a list holding the answer is unwrapped."""
+    response = [{"content": ["first answer"]}, {"content": ["second answer"]}]
+
+    assert parse_predictions(response, num_instructions=2) == [
+        "first answer",
+        "second answer",
+    ]
+
+
+def test_missing_predictions_are_an_error():
+    """Test that a response without one record per instruction is rejected."""
+    with pytest.raises(ValueError):
+        parse_predictions([{"content": "answer"}], num_instructions=2)
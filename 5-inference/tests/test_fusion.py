@@ -0,0 +1,79 @@
+import uuid
+
+import pytest
+from qdrant_client.http.models import ScoredPoint
+
+from rag.fusion import fuse_hits
+
+
+def make_hit(chunk: str, score: float) -> ScoredPoint:
+    return ScoredPoint(
+        id=str(uuid.uuid5(uuid.NAMESPACE_DNS, chunk)),
+        version=0,
+        score=score,
+        payload={"content": chunk},
+    )
+
+
+def contents(hits: list[ScoredPoint]) -> list[str]:
+    return [hit.payload["content"] for hit in hits]
+
+
+def test_fuse_hits_removes_duplicates():
+    """Test that a chunk found by several queries is returned once."""
+    hits_per_query = [
+        [make_hit("a", 0.9), make_hit("b", 0.8)],
+        [make_hit("b", 0.95), make_hit("c", 0.7)],
+    ]
+
+    hits = fuse_hits(hits_per_query)
+
+    assert sorted(contents(hits)) == ["a", "b", "c"]
+
+
+def test_fuse_hits_rrf_rewards_agreement_between_queries():
+    """Test that reciprocal rank fusion ranks chunks found by many queries first."""
+    hits_per_query = [
+        [make_hit("a", 0.9), make_hit("b", 0.8)],
+        [make_hit("c", 0.9), make_hit("b", 0.8)],
+        [make_hit("d", 0.9), make_hit("b", 0.8)],
+    ]
+
+    hits = fuse_hits(hits_per_query, method="rrf", rrf_k=60)
+
+    assert contents(hits)[0] == "b"
+    assert hits[0].score == pytest.approx(3 / 62)
+
+
+def test_fuse_hits_max_keeps_best_score():
+    """Test that max-score fusion keeps the best score of every chunk."""
+    hits_per_query = [
+        [make_hit("a", 0.6), make_hit("b", 0.5)],
+        [make_hit("b", 0.9), make_hit("a", 0.4)],
+    ]
+
+    hits = fuse_hits(hits_per_query, method="max")
+
+    assert contents(hits) == ["b", "a"]
+    assert [hit.score for hit in hits] == pytest.approx([0.9, 0.6])
+
+
+def test_fuse_hits_limits_candidates():
+    """Test that at most max_candidates hits are returned."""
+    hits_per_query = [[make_hit(str(i), 1 - i / 10) for i in range(10)]]
+
+    hits = fuse_hits(hits_per_query, max_candidates=3)
+
+    assert contents(hits) == ["0", "1", "2"]
+
+
+def test_fuse_hits_empty():
+    """Test that fusing no hits returns no hits."""
+    assert fuse_hits([]) == []
+    assert fuse_hits([[], []]) == []
+
+
+def test_fuse_hits_unsupported_method():
+    """Test that an unknown fusion method raises an error."""
+    with pytest.raises(ValueError):
+        fuse_hits([[make_hit("a", 0.9)]], method="unknown")
@@ -0,0 +1,186 @@
+import sqlite3
+from types import SimpleNamespace
+
+import pytest
+
+import llm.cache
+from config import settings
+from llm.cache import LLMResponseCache, build_cache_key
+from llm.chain import CachedChain
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeChain:
+    """LLMChain stand-in that numbers its answers by call."""
+
+    output_key = "answer"
+
+    def __init__(self, temperature: float = 0) -> None:
+        self.llm = SimpleNamespace(temperature=temperature, model_name="model")
+        self.prompt = SimpleNamespace(format=lambda **inputs: inputs["question"])
+        self.calls = 0
+
+    def invoke(self, inputs: dict) -> dict:
+        self.calls += 1
+
+        return {**inputs, self.output_key: f"answer {self.calls}"}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fixture to control the time seen by the cache."""
+    clock_instance = FakeClock()
+    monkeypatch.setattr(llm.cache.time, "time", clock_instance)
+
+    return clock_instance
+
+
+@pytest.fixture
+def sqlite_path(tmp_path):
+    return str(tmp_path / "llm_cache.sqlite")
+
+
+def build_cache(**kwargs) -> LLMResponseCache:
+    return LLMResponseCache(
+        **{"max_size": 2, "ttl_seconds": 60, "sqlite_path": None, **kwargs}
+    )
+
+
+def count_rows(sqlite_path: str) -> int:
+    with sqlite3.connect(sqlite_path) as db:
+        return db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+def test_entries_expire_after_ttl(clock):
+    """Test that an entry older than ttl_seconds is a miss."""
+    cache = build_cache()
+    cache.update("key", "value")
+
+    clock.now += 60
+    assert cache.lookup("key") == "value"
+
+    clock.now += 1
+    assert cache.lookup("key") is None
+    assert cache.metrics()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    """Test that the in-memory tier keeps at most max_size entries."""
+    cache = build_cache(max_size=2)
+    cache.update("first", "1")
+    cache.update("second", "2")
+
+    assert cache.lookup("first") == "1"
+    cache.update("third", "3")
+
+    assert cache.lookup("second") is None
+    assert cache.lookup("first") == "1"
+    assert cache.lookup("third") == "3"
+    assert cache.metrics()["size"] == 2
+
+
+def test_entries_are_served_from_sqlite(clock, sqlite_path):
+    """Test that the entries evicted from memory or written elsewhere are disk hits."""
+    cache = build_cache(max_size=1, sqlite_path=sqlite_path)
+    cache.update("first", "1")
+    cache.update("second", "2")
+
+    assert cache.lookup("first") == "1"
+    assert build_cache(sqlite_path=sqlite_path).lookup("second") == "2"
+    assert cache.metrics()["disk_hits"] == 1
+
+
+def test_expired_rows_are_deleted_on_lookup(clock, sqlite_path):
+    """Test that looking up an expired entry deletes its SQLite row."""
+    cache = build_cache(sqlite_path=sqlite_path)
+    cache.update("key", "value")
+
+    clock.now += 61
+    assert build_cache(sqlite_path=sqlite_path).lookup("key") is None
+
+    assert count_rows(sqlite_path) == 0
+
+
+def test_expired_rows_are_purged_periodically(clock, sqlite_path):
+    """Test that an update purges the expired rows once the purge interval is over."""
+    cache = build_cache(sqlite_path=sqlite_path, purge_interval_seconds=120)
+    cache.update("old", "value")
+
+    clock.now += 61
+    cache.update("new", "value")
+    assert count_rows(sqlite_path) == 2
+
+    clock.now += 60
+    cache.update("newer", "value")
+    assert count_rows(sqlite_path) == 2
+    assert cache.metrics()["purged"] == 1
+
+    clock.now += 1
+    assert cache.purge_expired() == 1
+    assert count_rows(sqlite_path) == 1
+
+
+def test_metrics(clock):
+    """Test that the metrics count the memory hits, disk hits and misses."""
+    cache = build_cache()
+    cache.update("key", "value")
+
+    cache.lookup("key")
+    cache.lookup("other key")
+
+    assert cache.metrics() == {
+        "memory_hits": 1,
+        "disk_hits": 0,
+        "misses": 1,
+        "purged": 0,
+        "hit_ratio": 0.5,
+        "size": 1,
+    }
+
+
+def test_cache_key_scheme():
+    """Test that the key ignores whitespace but not the model id or the temperature."""
+    key = build_cache_key("What is  RAG?\n", model_id="model", temperature=0)
+
+    assert key == build_cache_key(" What is RAG?", model_id="model", temperature=0)
+    assert key != build_cache_key("What is RAG?", model_id="other", temperature=0)
+    assert key != build_cache_key("What is RAG?", model_id="model", temperature=1)
+
+
+def test_cached_chain_serves_repeated_prompts(clock):
+    """Test that a deterministic chain is called once for the same prompt."""
+    chain = FakeChain(temperature=0)
+    cached_chain = CachedChain(chain=chain, cache=build_cache())
+
+    first = cached_chain.invoke({"question": "What is RAG?"})
+    second = cached_chain.invoke({"question": "What is  RAG?"})
+
+    assert chain.calls == 1
+    assert first["answer"] == second["answer"] == "answer 1"
+
+
+def test_cached_chain_bypasses_sampling_llms(clock, monkeypatch):
+    """Test that a chain sampling with temperature > 0 is never cached."""
+    monkeypatch.setattr(settings, "LLM_CACHE_DETERMINISTIC_ONLY", True)
+    chain = FakeChain(temperature=0.7)
+    cache = build_cache()
+    cached_chain = CachedChain(chain=chain, cache=cache)
+
+    cached_chain.invoke({"question": "What is RAG?"})
+    cached_chain.invoke({"question": "What is RAG?"})
+
+    assert chain.calls == 2
+    assert cache.metrics()["size"] == 0
+
+    monkeypatch.setattr(settings, "LLM_CACHE_DETERMINISTIC_ONLY", False)
+    cached_chain.invoke({"question": "What is RAG?"})
+    cached_chain.invoke({"question": "What is RAG?"})
+
+    assert chain.calls == 3
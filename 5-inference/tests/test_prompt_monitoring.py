@@ -0,0 +1,110 @@
+import json
+import threading
+
+import pytest
+
+import monitoring.prompt_monitoring
+from monitoring import JSONLMonitoringSink, PromptMonitoringManager
+
+
+class BlockingJSONLMonitoringSink(JSONLMonitoringSink):
+    """JSONL sink that holds every write until it is released."""
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self.writing = threading.Event()
+        self.released = threading.Event()
+
+    def write(self, events: list[dict]) -> None:
+        self.writing.set()
+        self.released.wait(timeout=5)
+
+        super().write(events)
+
+
+def read_events(path) -> list[dict]:
+    with open(path) as file:
+        return [json.loads(line) for line in file]
+
+
+@pytest.fixture
+def path(tmp_path):
+    """Fixture to write the monitoring events to a temporary JSONL file."""
+    return tmp_path / "monitoring" / "events.jsonl"
+
+
+def test_events_are_dropped_when_the_queue_is_full(path):
+    """Test that the queue is bounded and the events that do not fit are counted."""
+    sink = BlockingJSONLMonitoringSink(str(path))
+    manager = PromptMonitoringManager(
+        sink=sink, max_queue_size=2, batch_size=1, flush_interval_seconds=0.01
+    )
+
+    manager.log_chain(query="query 0", response="response", eval_output="eval")
+    assert sink.writing.wait(timeout=5)
+    for i in range(1, 5):
+        manager.log_chain(query=f"query {i}", response="response", eval_output="eval")
+
+    metrics = manager.metrics()
+    assert metrics["enqueued"] == 3
+    assert metrics["dropped"] == 2
+    assert metrics["queue_size"] == 2
+
+    sink.released.set()
+    manager.close(timeout=5)
+
+    queries = [event["data"]["query"] for event in read_events(path)]
+    assert queries == ["query 0", "query 1", "query 2"]
+    assert manager.metrics()["written"] == 3
+
+
+def test_events_are_sampled(path, monkeypatch):
+    """Test that only the sampled fraction of the events is enqueued."""
+    draws = iter([0.1, 0.9, 0.3, 0.7])
+    monkeypatch.setattr(
+        monitoring.prompt_monitoring.random, "random", lambda: next(draws)
+    )
+    manager = PromptMonitoringManager(
+        sink=JSONLMonitoringSink(str(path)), sample_rate=0.5
+    )
+
+    for i in range(4):
+        manager.log(prompt=f"prompt {i}", output="output")
+    manager.close(timeout=5)
+
+    metrics = manager.metrics()
+    assert metrics["enqueued"] == 2
+    assert metrics["sampled_out"] == 2
+    assert [event["data"]["prompt"] for event in read_events(path)] == [
+        "prompt 0",
+        "prompt 2",
+    ]
+
+
+def test_pending_events_are_flushed_on_close(path):
+    """Test that closing the manager writes the events of a partial batch right away."""
+    manager = PromptMonitoringManager(
+        sink=JSONLMonitoringSink(str(path)),
+        batch_size=100,
+        flush_interval_seconds=60,
+    )
+
+    for i in range(3):
+        manager.log(prompt=f"prompt {i}", output="output", metadata={"index": i})
+    manager.close(timeout=5)
+
+    events = read_events(path)
+    assert [event["type"] for event in events] == ["prompt"] * 3
+    assert [event["data"]["metadata"]["index"] for event in events] == [0, 1, 2]
+    assert manager.metrics()["written"] == 3
+
+
+def test_events_logged_after_close_are_dropped(path):
+    """Test that a closed manager no longer accepts events."""
+    manager = PromptMonitoringManager(sink=JSONLMonitoringSink(str(path)))
+    manager.close(timeout=5)
+
+    manager.log(prompt="prompt", output="output")
+
+    assert manager.metrics()["dropped"] == 1
+    assert not path.exists()
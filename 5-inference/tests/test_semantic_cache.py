@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+import llm.semantic_cache
+from llm.semantic_cache import SemanticAnswerCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fixture to control the time seen by the cache."""
+    clock_instance = FakeClock()
+    monkeypatch.setattr(llm.semantic_cache.time, "time", clock_instance)
+
+    return clock_instance
+
+
+def build_cache(**kwargs) -> SemanticAnswerCache:
+    return SemanticAnswerCache(
+        **{"dim": 2, "threshold": 0.95, "max_size": 4, "ttl_seconds": 60, **kwargs}
+    )
+
+
+def test_similar_query_is_a_hit(clock):
+    """Test that a query above the similarity threshold gets the cached answer."""
+    cache = build_cache()
+    cache.update(np.array([1.0, 0.0]), "author", answer="answer")
+
+    assert cache.lookup(np.array([10.0, 0.5]), "author") == "answer"
+    assert cache.metrics()["hits"] == 1
+
+
+def test_dissimilar_query_is_a_miss(clock):
+    """Test that a query below the similarity threshold is not answered."""
+    cache = build_cache()
+    cache.update(np.array([1.0, 0.0]), "author", answer="answer")
+
+    assert cache.lookup(np.array([1.0, 1.0]), "author") is None
+    assert cache.has_candidates(np.array([1.0, 1.0])) is False
+    assert cache.metrics()["misses"] == 2
+
+
+def test_answers_are_scoped_by_author(clock):
+    """Test that an answer is only returned for the author_id it was generated for."""
+    cache = build_cache()
+    cache.update(np.array([1.0, 0.0]), "author", answer="answer")
+
+    assert cache.has_candidates(np.array([1.0, 0.0])) is True
+    assert cache.lookup(np.array([1.0, 0.0]), "other author") is None
+    assert cache.lookup(np.array([1.0, 0.0]), None) is None
+    assert cache.lookup(np.array([1.0, 0.0]), "author") == "answer"
+
+
+def test_entries_expire_after_ttl(clock):
+    """Test that an entry older than ttl_seconds is no longer returned."""
+    cache = build_cache(ttl_seconds=60)
+    cache.update(np.array([1.0, 0.0]), "author", answer="answer")
+
+    clock.now += 60
+    assert cache.lookup(np.array([1.0, 0.0]), "author") == "answer"
+
+    clock.now += 1
+    assert cache.has_candidates(np.array([1.0, 0.0])) is False
+    assert cache.lookup(np.array([1.0, 0.0]), "author") is None
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    """Test that a full cache evicts the entry that was used the longest time ago."""
+    cache = build_cache(max_size=2)
+    cache.update(np.array([1.0, 0.0]), "author", answer="first")
+    cache.update(np.array([0.0, 1.0]), "author", answer="second")
+
+    assert cache.lookup(np.array([1.0, 0.0]), "author") == "first"
+    cache.update(np.array([-1.0, 0.0]), "author", answer="third")
+
+    assert cache.lookup(np.array([1.0, 0.0]), "author") == "first"
+    assert cache.lookup(np.array([0.0, 1.0]), "author") is None
+    assert cache.lookup(np.array([-1.0, 0.0]), "author") == "third"
+    assert cache.metrics()["size"] == 2
+
+
+def test_expired_entries_are_reused_first(clock):
+    """Test that an update reuses an expired slot before evicting a live entry."""
+    cache = build_cache(max_size=2, ttl_seconds=60)
+    cache.update(np.array([1.0, 0.0]), "author", answer="old")
+    clock.now += 30
+    cache.update(np.array([0.0, 1.0]), "author", answer="live")
+    assert cache.lookup(np.array([1.0, 0.0]), "author") == "old"
+
+    clock.now += 31
+    cache.update(np.array([-1.0, 0.0]), "author", answer="new")
+
+    assert cache.lookup(np.array([0.0, 1.0]), "author") == "live"
+    assert cache.lookup(np.array([-1.0, 0.0]), "author") == "new"
@@ -11,6 +11,11 @@ class Settings(BaseSettings):
     RABBITMQ_HOST: str = "mq"  # or localhost if running outside Docker
     RABBITMQ_PORT: int = 5672
     RABBITMQ_QUEUE_NAME: str = "default"
+    RABBITMQ_QUEUE_SHARDS: int = 1
+    # Messages stay unacked for about two bytewax epochs, see RabbitMQPartition.
+    RABBITMQ_PREFETCH_COUNT: int = 1024
+    RABBITMQ_BATCH_MAX_SIZE: int = 64
+    RABBITMQ_BATCH_TIME_BUDGET_SECONDS: float = 0.5
 
     # Superlinked
     SUPERLINKED_SERVER_URL: str = (
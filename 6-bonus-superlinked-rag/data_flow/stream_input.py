@@ -1,11 +1,11 @@
 import json
 import time
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import Generic, Iterable, List, Optional, TypeVar
 
 from bytewax.inputs import FixedPartitionedSource, StatefulSourcePartition
 from config import settings
-from mq import RabbitMQConnection
+from mq import list_queue_shards, open_blocking_connection
 from utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -16,65 +16,165 @@ MessageT = TypeVar("MessageT")
 
 class RabbitMQSource(FixedPartitionedSource, Generic[DataT, MessageT]):
     def list_parts(self) -> List[str]:
-        return ["single partition"]
+        return list_queue_shards(
+            settings.RABBITMQ_QUEUE_NAME, settings.RABBITMQ_QUEUE_SHARDS
+        )
 
     def build_part(
         self, now: datetime, for_part: str, resume_state: MessageT | None = None
     ) -> StatefulSourcePartition[DataT, MessageT]:
-        return RabbitMQPartition(queue_name=settings.RABBITMQ_QUEUE_NAME)
+        return RabbitMQPartition(queue_name=for_part, resume_state=resume_state)
 
 
 class RabbitMQPartition(StatefulSourcePartition, Generic[DataT, MessageT]):
     """
     Class responsible for creating a connection between bytewax and rabbitmq that facilitates the transfer of data from mq to bytewax streaming piepline.
     Inherits StatefulSourcePartition for snapshot functionality that enables saving the state of the queue
+    Every partition consumes its queue shard over a connection of its own, as the partitions of a process are read from different worker threads.
+    `resume_state` is accepted for the bytewax interface but ignored: the messages left unacked by a previous run are redelivered by RabbitMQ.
+    Delivery is at least once: the messages emitted during an epoch are acked at the snapshot that follows the epoch's own snapshot, once that epoch has closed.
+    The prefetch window must therefore hold about two epochs of messages.
     """
 
-    def __init__(self, queue_name: str, resume_state: MessageT | None = None) -> None:
-        self._in_flight_msg_ids = resume_state or set()
+    def __init__(
+        self,
+        queue_name: str,
+        resume_state: MessageT | None = None,
+        prefetch_count: int = settings.RABBITMQ_PREFETCH_COUNT,
+        batch_max_size: int = settings.RABBITMQ_BATCH_MAX_SIZE,
+        batch_time_budget: float = settings.RABBITMQ_BATCH_TIME_BUDGET_SECONDS,
+        reconnect_delay: float = 10.0,
+    ) -> None:
+        self._in_flight_msg_ids = set()
+        self._snapshot_msg_ids = set()
+        self._buffer = []
+        self._batch_deadline: Optional[float] = None
+        self._awake_at: Optional[float] = None
         self.queue_name = queue_name
-        self.connection = RabbitMQConnection()
-
-        try:
-            self.connection.connect()
-            self.channel = self.connection.get_channel()
-        except Exception:
-            logger.warning(
-                f"Error while trying to connect to the queue and get the current channel {self.queue_name}",
-            )
+        self.prefetch_count = prefetch_count
+        self.batch_max_size = batch_max_size
+        self.batch_time_budget = batch_time_budget
+        self.reconnect_delay = reconnect_delay
+        self.connection = None
+        self.channel = None
+
+        self._connect()
+
+    def _connect(self) -> None:
+        self._close_connection()
+        self.connection = open_blocking_connection()
+        channel = self.connection.channel()
+
+        channel.queue_declare(
+            queue=self.queue_name, durable=True, exclusive=False, auto_delete=False
+        )
+        channel.basic_qos(prefetch_count=self.prefetch_count)
+        channel.basic_consume(
+            queue=self.queue_name,
+            on_message_callback=self._on_message,
+            auto_ack=False,
+        )
+        self.channel = channel
+
+    def _on_message(self, channel, method_frame, header_frame, body) -> None:
+        if not self._buffer:
+            self._batch_deadline = time.monotonic() + self.batch_time_budget
+        self._buffer.append((method_frame.delivery_tag, body))
 
     def next_batch(self, sched: Optional[datetime]) -> Iterable[DataT]:
         try:
-            method_frame, header_frame, body = self.channel.basic_get(
-                queue=self.queue_name, auto_ack=True
-            )
+            if self.channel is None:
+                self._connect()
+
+            # Only the messages that already arrived are read, as `next_batch` must
+            # not block the worker. `next_awake` schedules the next poll.
+            self.channel.connection.process_data_events(time_limit=0)
         except Exception:
             logger.warning(
                 f"Error while fetching message from queue: {self.queue_name}", 
             )
-            time.sleep(10)  # Sleep for 10 seconds before retrying to access the queue.
+            self._drop_channel()
+            # Retry to access the queue after `reconnect_delay` seconds.
+            self._awake_at = time.monotonic() + self.reconnect_delay
 
-            self.connection.connect()
-            self.channel = self.connection.get_channel()
+            return []
+
+        now = time.monotonic()
+        if len(self._buffer) < self.batch_max_size and (
+            not self._buffer or now < self._batch_deadline
+        ):
+            # Wait for a full batch, at most for the time budget of the oldest message.
+            self._awake_at = (
+                self._batch_deadline if self._buffer else now + self.batch_time_budget
+            )
 
             return []
 
-        if method_frame:
-            message_id = method_frame.delivery_tag
+        batch = self._buffer[: self.batch_max_size]
+        self._buffer = self._buffer[self.batch_max_size :]
+        self._batch_deadline = now if self._buffer else None
+        # Poll again right away, as more messages may be waiting.
+        self._awake_at = None
+
+        messages = []
+        for message_id, body in batch:
             self._in_flight_msg_ids.add(message_id)
+            messages.append(json.loads(body))
 
-            return [json.loads(body)]
-        else:
-            return []
+        return messages
+
+    def next_awake(self) -> Optional[datetime]:
+        if self._awake_at is None:
+            return None
+
+        delay = max(self._awake_at - time.monotonic(), 0.0)
 
-    def snapshot(self) -> MessageT:
-        return self._in_flight_msg_ids
+        return datetime.now(timezone.utc) + timedelta(seconds=delay)
 
-    def garbage_collect(self, state):
-        closed_in_flight_msg_ids = state
-        for msg_id in closed_in_flight_msg_ids:
-            self.channel.basic_ack(delivery_tag=msg_id)
-            self._in_flight_msg_ids.remove(msg_id)
+    def snapshot(self) -> Optional[MessageT]:
+        # The epoch of the previous snapshot has closed by now, so its messages are
+        # acked. The messages emitted since are acked at the next snapshot.
+        self._ack(self._snapshot_msg_ids)
+        self._snapshot_msg_ids = self._in_flight_msg_ids
+        self._in_flight_msg_ids = set()
+
+        return None
 
     def close(self):
-        self.channel.close()
+        # The messages not acked yet are redelivered by RabbitMQ.
+        if self.channel is not None:
+            self.channel.close()
+        self._close_connection()
+
+    def _ack(self, msg_ids: set) -> None:
+        if self.channel is None:
+            return
+
+        try:
+            for msg_id in sorted(msg_ids):
+                self.channel.basic_ack(delivery_tag=msg_id)
+        except Exception:
+            logger.warning(
+                f"Failed to ack messages of the queue {self.queue_name}, they will be redelivered."
+            )
+            self._drop_channel()
+
+    def _drop_channel(self) -> None:
+        # The unacked messages of the broken channel are requeued by RabbitMQ, and
+        # their delivery tags are meaningless on a new channel.
+        self._buffer.clear()
+        self._batch_deadline = None
+        self._in_flight_msg_ids.clear()
+        self._snapshot_msg_ids.clear()
+        self.channel = None
+        self._close_connection()
+
+    def _close_connection(self) -> None:
+        if self.connection is not None and self.connection.is_open:
+            try:
+                self.connection.close()
+            except Exception:
+                logger.warning(
+                    f"Failed to close RabbitMQ connection of the queue {self.queue_name}"
+                )
+        self.connection = None
@@ -5,7 +5,7 @@ from bson import json_util
 
 from data_ingestion.config import settings
 from data_ingestion.db import MongoDatabaseConnector
-from data_ingestion.mq import publish_to_rabbitmq
+from data_ingestion.mq import get_shard_queue_name, publish_to_rabbitmq
 
 # Configure logging
 logging.basicConfig(
@@ -41,7 +41,12 @@ def stream_process():
             )
 
             # Send data to rabbitmq
-            publish_to_rabbitmq(queue_name=settings.RABBITMQ_QUEUE_NAME, data=data)
+            queue_name = get_shard_queue_name(
+                settings.RABBITMQ_QUEUE_NAME,
+                routing_key=entry_id,
+                num_shards=settings.RABBITMQ_QUEUE_SHARDS,
+            )
+            publish_to_rabbitmq(queue_name=queue_name, data=data)
             logging.info(f"Data of type '{data_type}' published to RabbitMQ.")
 
     except Exception as e:
@@ -13,6 +13,7 @@ class Settings(BaseSettings):
     RABBITMQ_DEFAULT_USERNAME: str = "guest"
     RABBITMQ_DEFAULT_PASSWORD: str = "guest"
     RABBITMQ_QUEUE_NAME: str = "default"
+    RABBITMQ_QUEUE_SHARDS: int = 1
 
 
 settings = Settings()
@@ -1,3 +1,4 @@
+import zlib
 from logging import getLogger
 
 import pika
@@ -82,6 +83,15 @@ class RabbitMQConnection:
             print("Closed RabbitMQ connection")
 
 
+def get_shard_queue_name(queue_name: str, routing_key: str, num_shards: int) -> str:
+    """Map a routing key (e.g. the entry id) to one of the shards of `queue_name`."""
+    if num_shards <= 1:
+        return queue_name
+
+    shard = zlib.crc32(routing_key.encode()) % num_shards
+    return f"{queue_name}.{shard}"
+
+
 def publish_to_rabbitmq(queue_name: str, data: str):
     """Publish data to a RabbitMQ queue."""
     try:
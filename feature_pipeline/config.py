@@ -12,10 +12,27 @@ class Settings(BaseSettings):
     EMBEDDING_MODEL_MAX_INPUT_LENGTH: int = 256
     EMBEDDING_SIZE: int = 384
     EMBEDDING_MODEL_DEVICE: str = "cpu"
+    REPOSITORY_EMBEDDING_MODEL_ID: str = "hkunlp/instructor-xl"
+    EMBEDDING_MODEL_REGISTRY_MAX_SIZE: int = 2
+    EMBEDDING_MODEL_WARMUP: bool = True
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_BATCH_MAX_WAIT_SECONDS: float = 1.0
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_DIR: str = ".cache/embeddings"
+    EMBEDDING_CACHE_MAX_SIZE: int = 100_000
+    EMBEDDING_CACHE_TTL_SECONDS: float | None = None
 
     # OpenAI
     OPENAI_MODEL_ID: str = "gpt-4-1106-preview"
     OPENAI_API_KEY: str | None = None
+    OPENAI_REQUESTS_PER_MINUTE: int = 500
+    OPENAI_TOKENS_PER_MINUTE: int = 160_000
+    OPENAI_MAX_RETRIES: int = 6
+    OPENAI_RETRY_BACKOFF_SECONDS: float = 1.0
+
+    # Finetuning dataset generation config
+    DATASET_GENERATION_MAX_CONCURRENCY: int = 16
+    DATASET_GENERATION_CHECKPOINT_DIR: str = ".cache/dataset_generation"
 
     # MQ config
     RABBITMQ_DEFAULT_USERNAME: str = "guest"
@@ -23,13 +40,29 @@ class Settings(BaseSettings):
     RABBITMQ_HOST: str = "mq" # or localhost if running outside Docker
     RABBITMQ_PORT: int = 5672
     RABBITMQ_QUEUE_NAME: str = "default"
+    RABBITMQ_QUEUE_SHARDS: int = 1
+    # Messages stay unacked for about two bytewax epochs, see RabbitMQPartition.
+    RABBITMQ_PREFETCH_COUNT: int = 1024
+    RABBITMQ_BATCH_MAX_SIZE: int = 64
+    RABBITMQ_BATCH_TIME_BUDGET_SECONDS: float = 0.5
 
     # QdrantDB config
     QDRANT_DATABASE_HOST: str = "qdrant" # or localhost if running outside Docker
     QDRANT_DATABASE_PORT: int = 6333
+    QDRANT_DATABASE_GRPC_PORT: int = 6334
+    QDRANT_PREFER_GRPC: bool = False
     USE_QDRANT_CLOUD: bool = False # if True, fill in QDRANT_CLOUD_URL and QDRANT_APIKEY
     QDRANT_CLOUD_URL: str | None = None
     QDRANT_APIKEY: str | None = None
+    QDRANT_SINK_SUB_BATCH_SIZE: int = 64
+    QDRANT_SINK_MAX_WORKERS: int = 4
+    QDRANT_SINK_MAX_RETRIES: int = 3
+    QDRANT_SINK_RETRY_BACKOFF_SECONDS: float = 0.5
+    QDRANT_BULK_SUB_BATCH_SIZE: int = 256
+    QDRANT_BULK_PARALLEL: int = 4
+    QDRANT_BULK_MAX_RETRIES: int = 3
+    QDRANT_BULK_RETRY_BACKOFF_SECONDS: float = 0.5
+    QDRANT_SCROLL_PAGE_SIZE: int = 256
 
 
 settings = Settings()
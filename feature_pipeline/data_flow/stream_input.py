@@ -2,12 +2,13 @@ import json
 import time
 from collections.abc import Iterable
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import Generic, TypeVar
 
 from bytewax.inputs import FixedPartitionedSource, StatefulSourcePartition
 from config import settings
-from mq import RabbitMQConnection
+from mq import list_queue_shards, open_blocking_connection
+from pika import BlockingConnection
 from pika.adapters.blocking_connection import BlockingChannel
 from utils.logging import get_logger
 
@@ -19,65 +20,174 @@ MessageT = TypeVar("MessageT")
 
 @dataclass
 class RabbitMQPartition(StatefulSourcePartition, Generic[DataT, MessageT]):
+    """
+    Consumes one queue shard over a connection of its own, as the partitions of a
+    process are read from different worker threads. `resume_state` is accepted for
+    the bytewax interface but ignored: the messages left unacked by a previous run
+    are redelivered by RabbitMQ.
+
+    Delivery is at least once. The messages emitted during an epoch are acked at
+    the snapshot that follows the epoch's own snapshot, once that epoch has closed
+    and its chunks had a whole epoch to be collected and written to Qdrant. The
+    prefetch window must therefore hold about two epochs of messages.
+    """
+
     queue_name: str
     resume_state: MessageT | None = None
-    connection: RabbitMQConnection = field(init=False)
-    channel: BlockingChannel = field(init=False)
+    prefetch_count: int = settings.RABBITMQ_PREFETCH_COUNT
+    batch_max_size: int = settings.RABBITMQ_BATCH_MAX_SIZE
+    batch_time_budget: float = settings.RABBITMQ_BATCH_TIME_BUDGET_SECONDS
+    reconnect_delay: float = 10.0
+    connection: BlockingConnection | None = field(init=False)
+    channel: BlockingChannel | None = field(init=False)
     _in_flight_msg_ids: set = field(init=False)
+    _snapshot_msg_ids: set = field(init=False)
+    _buffer: list = field(init=False)
+    _batch_deadline: float | None = field(init=False)
+    _awake_at: float | None = field(init=False)
 
     def __post_init__(self):
-        if self.resume_state is None:
-            self._in_flight_msg_ids = set()
-        self.connection = RabbitMQConnection()
-        self.connection.connect()
-
-        channel = self.connection.get_channel()
-        if channel is None:
-            raise ValueError("Channel not initialized")
+        self._in_flight_msg_ids = set()
+        self._snapshot_msg_ids = set()
+        self._buffer = []
+        self._batch_deadline = None
+        self._awake_at = None
+        self.connection = None
+        self.channel = None
+        self._connect()
+
+    def _connect(self) -> None:
+        self._close_connection()
+        self.connection = open_blocking_connection()
+        channel = self.connection.channel()
+
+        channel.queue_declare(
+            queue=self.queue_name, durable=True, exclusive=False, auto_delete=False
+        )
+        channel.basic_qos(prefetch_count=self.prefetch_count)
+        channel.basic_consume(
+            queue=self.queue_name,
+            on_message_callback=self._on_message,
+            auto_ack=False,
+        )
         self.channel = channel
 
+    def _on_message(self, channel, method_frame, header_frame, body) -> None:
+        if not self._buffer:
+            self._batch_deadline = time.monotonic() + self.batch_time_budget
+        self._buffer.append((method_frame.delivery_tag, body))
+
     def next_batch(self, sched: datetime | None) -> Iterable[DataT]:
         try:
-            method_frame, header_frame, body = self.channel.basic_get(
-                queue=self.queue_name, auto_ack=True
-            )
+            if self.channel is None:
+                self._connect()
+
+            # Only the messages that already arrived are read, as `next_batch` must
+            # not block the worker. `next_awake` schedules the next poll.
+            self.channel.connection.process_data_events(time_limit=0)
         except Exception:
             logger.error(
                 f"Error while fetching message from queue.", queue_name=self.queue_name
             )
-            time.sleep(10)
-            self.connection.connect()
-            channel = self.connection.get_channel()
-            if channel is None:
-                raise ValueError("Channel not initialized")
-            self.channel = channel
+            self._drop_channel()
+            self._awake_at = time.monotonic() + self.reconnect_delay
+
             return []
 
-        if method_frame:
-            message_id = method_frame.delivery_tag
-            self._in_flight_msg_ids.add(message_id)
-            return [json.loads(body)]
-        else:
+        now = time.monotonic()
+        if len(self._buffer) < self.batch_max_size and (
+            not self._buffer or now < self._batch_deadline
+        ):
+            # Wait for a full batch, at most for the time budget of the oldest message.
+            self._awake_at = (
+                self._batch_deadline if self._buffer else now + self.batch_time_budget
+            )
+
             return []
 
-    def snapshot(self) -> MessageT | set:
-        return self._in_flight_msg_ids
+        batch = self._buffer[: self.batch_max_size]
+        self._buffer = self._buffer[self.batch_max_size :]
+        self._batch_deadline = now if self._buffer else None
+        # Poll again right away, as more messages may be waiting.
+        self._awake_at = None
+
+        messages = []
+        for message_id, body in batch:
+            self._in_flight_msg_ids.add(message_id)
+            messages.append(json.loads(body))
+
+        return messages
+
+    def next_awake(self) -> datetime | None:
+        if self._awake_at is None:
+            return None
+
+        delay = max(self._awake_at - time.monotonic(), 0.0)
+
+        return datetime.now(timezone.utc) + timedelta(seconds=delay)
 
-    def garbage_collect(self, state):
-        closed_in_flight_msg_ids = state
-        for msg_id in closed_in_flight_msg_ids:
-            self.channel.basic_ack(delivery_tag=msg_id)
-            self._in_flight_msg_ids.remove(msg_id)
+    def snapshot(self) -> MessageT | None:
+        # The epoch of the previous snapshot has closed by now, so its messages are
+        # acked. The messages emitted since are acked at the next snapshot.
+        self._ack(self._snapshot_msg_ids)
+        self._snapshot_msg_ids = self._in_flight_msg_ids
+        self._in_flight_msg_ids = set()
+
+        return None
 
     def close(self):
-        self.channel.close()
+        # The messages not acked yet are redelivered by RabbitMQ.
+        if self.channel is not None:
+            self.channel.close()
+        self._close_connection()
+
+    def _ack(self, msg_ids: set) -> None:
+        if self.channel is None:
+            return
+
+        try:
+            for msg_id in sorted(msg_ids):
+                self.channel.basic_ack(delivery_tag=msg_id)
+        except Exception:
+            logger.warning(
+                "Failed to ack messages, they will be redelivered.",
+                queue_name=self.queue_name,
+            )
+            self._drop_channel()
+
+    def _drop_channel(self) -> None:
+        # The unacked messages of the broken channel are requeued by RabbitMQ, and
+        # their delivery tags are meaningless on a new channel.
+        self._buffer.clear()
+        self._batch_deadline = None
+        self._in_flight_msg_ids.clear()
+        self._snapshot_msg_ids.clear()
+        self.channel = None
+        self._close_connection()
+
+    def _close_connection(self) -> None:
+        if self.connection is not None and self.connection.is_open:
+            try:
+                self.connection.close()
+            except Exception:
+                logger.warning(
+                    "Failed to close RabbitMQ connection.", queue_name=self.queue_name
+                )
+        self.connection = None
 
 
 class RabbitMQSource(FixedPartitionedSource):
+    """
+    Every queue shard of RABBITMQ_QUEUE_NAME is exposed as its own partition,
+    which bytewax distributes over all the workers of the dataflow.
+    """
+
     def list_parts(self) -> list[str]:
-        return ["single partition"]
+        return list_queue_shards(
+            settings.RABBITMQ_QUEUE_NAME, settings.RABBITMQ_QUEUE_SHARDS
+        )
 
     def build_part(
         self, now: datetime, for_part: str, resume_state: MessageT | None = None
     ) -> StatefulSourcePartition[object, MessageT]:
-        return RabbitMQPartition(queue_name=settings.RABBITMQ_QUEUE_NAME)
+        return RabbitMQPartition(queue_name=for_part, resume_state=resume_state)
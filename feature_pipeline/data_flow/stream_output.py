@@ -1,7 +1,11 @@
+from abc import abstractmethod
+from collections import defaultdict
+
 from bytewax.outputs import DynamicSink, StatelessSinkPartition
 from qdrant_client.http.exceptions import UnexpectedResponse
 from qdrant_client.models import Batch
 
+from feature_pipeline.config import settings
 from feature_pipeline.db import QdrantDatabaseConnector
 from feature_pipeline.models.base import VectorDBDataModel
 from feature_pipeline.utils.logging import get_logger
@@ -96,44 +100,78 @@ class QdrantOutput(DynamicSink):
             raise ValueError(f"Unsupported sink type: {self._sink_type}")
 
 
-class QdrantCleanedDataSink(StatelessSinkPartition):
-    def __init__(self, connection: QdrantDatabaseConnector):
+class QdrantDataSink(StatelessSinkPartition):
+    """
+    Base sink that groups every batch by data type and upserts each group into its own
+    collection with `bulk_write`, in concurrent sub-batches that are retried
+    independently.
+    """
+
+    def __init__(
+        self,
+        connection: QdrantDatabaseConnector,
+        sub_batch_size: int = settings.QDRANT_SINK_SUB_BATCH_SIZE,
+        max_workers: int = settings.QDRANT_SINK_MAX_WORKERS,
+        max_retries: int = settings.QDRANT_SINK_MAX_RETRIES,
+        retry_backoff: float = settings.QDRANT_SINK_RETRY_BACKOFF_SECONDS,
+    ):
         self._client = connection
+        self._sub_batch_size = sub_batch_size
+        self._max_workers = max_workers
+        self._max_retries = max_retries
+        self._retry_backoff = retry_backoff
+
+    @abstractmethod
+    def get_collection(self, data_type: str) -> str:
+        pass
+
+    @abstractmethod
+    def to_points(self, items: list[VectorDBDataModel]) -> Batch:
+        pass
 
     def write_batch(self, items: list[VectorDBDataModel]) -> None:
+        items_by_type = defaultdict(list)
+        for item in items:
+            items_by_type[item.type].append(item)
+
+        for data_type, typed_items in items_by_type.items():
+            collection_name = self.get_collection(data_type)
+            self._client.bulk_write(
+                collection_name=collection_name,
+                points=self.to_points(typed_items),
+                sub_batch_size=self._sub_batch_size,
+                parallel=self._max_workers,
+                max_retries=self._max_retries,
+                retry_backoff=self._retry_backoff,
+            )
+
+            logger.info(
+                "Successfully inserted requested point(s)",
+                collection_name=collection_name,
+                num=len(typed_items),
+            )
+
+
+class QdrantCleanedDataSink(QdrantDataSink):
+    def get_collection(self, data_type: str) -> str:
+        return get_clean_collection(data_type=data_type)
+
+    def to_points(self, items: list[VectorDBDataModel]) -> Batch:
         payloads = [item.to_payload() for item in items]
         ids, data = zip(*payloads)
-        collection_name = get_clean_collection(data_type=data[0]["type"])
-        self._client.write_data(
-            collection_name=collection_name,
-            points=Batch(ids=ids, vectors={}, payloads=data),
-        )
 
-        logger.info(
-            "Successfully inserted requested cleaned point(s)",
-            collection_name=collection_name,
-            num=len(ids),
-        )
+        return Batch(ids=ids, vectors={}, payloads=data)
 
 
-class QdrantVectorDataSink(StatelessSinkPartition):
-    def __init__(self, connection: QdrantDatabaseConnector):
-        self._client = connection
+class QdrantVectorDataSink(QdrantDataSink):
+    def get_collection(self, data_type: str) -> str:
+        return get_vector_collection(data_type=data_type)
 
-    def write_batch(self, items: list[VectorDBDataModel]) -> None:
+    def to_points(self, items: list[VectorDBDataModel]) -> Batch:
         payloads = [item.to_payload() for item in items]
         ids, vectors, meta_data = zip(*payloads)
-        collection_name = get_vector_collection(data_type=meta_data[0]["type"])
-        self._client.write_data(
-            collection_name=collection_name,
-            points=Batch(ids=ids, vectors=vectors, payloads=meta_data),
-        )
-
-        logger.info(
-            "Successfully inserted requested vector point(s)",
-            collection_name=collection_name,
-            num=len(ids),
-        )
+
+        return Batch(ids=ids, vectors=vectors, payloads=meta_data)
 
 
 def get_clean_collection(data_type: str) -> str:
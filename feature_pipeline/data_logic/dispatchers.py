@@ -1,3 +1,5 @@
+from collections import defaultdict
+
 from feature_pipeline.data_logic.chunking_data_handlers import (
     ArticleChunkingHandler,
     ChunkingDataHandler,
@@ -135,3 +137,22 @@ class EmbeddingDispatcher:
         )
 
         return embedded_chunk_model
+
+    @classmethod
+    def dispatch_embedder_batch(cls, data_models: list[DataModel]) -> list[DataModel]:
+        data_models_by_type = defaultdict(list)
+        for data_model in data_models:
+            data_models_by_type[data_model.type].append(data_model)
+
+        embedded_chunk_models = []
+        for data_type, typed_data_models in data_models_by_type.items():
+            handler = cls.cleaning_factory.create_handler(data_type)
+            embedded_chunk_models.extend(handler.embedd_batch(typed_data_models))
+
+        logger.info(
+            "Chunk batch embedded successfully.",
+            num=len(embedded_chunk_models),
+            data_types=list(data_models_by_type.keys()),
+        )
+
+        return embedded_chunk_models
@@ -1,6 +1,9 @@
 from abc import ABC, abstractmethod
 from typing import Generic, TypeVar
 
+import numpy as np
+
+from feature_pipeline.config import settings
 from feature_pipeline.models.chunk import (
     ArticleChunkModel,
     PostChunkModel,
@@ -11,7 +14,8 @@ from feature_pipeline.models.embedded_chunk import (
     PostEmbeddedChunkModel,
     RepositoryEmbeddedChunkModel,
 )
-from feature_pipeline.utils.embeddings import embedd_text
+from feature_pipeline.utils.embedding_cache import EmbeddingCache
+from feature_pipeline.utils.embeddings import embedd_texts
 
 ChunkedDataModelT = TypeVar("ChunkedDataModelT")
 EmbeddedDataModelT = TypeVar("EmbeddedDataModelT")
@@ -23,21 +27,65 @@ class EmbeddingDataHandler(ABC, Generic[ChunkedDataModelT, EmbeddedDataModelT]):
     All data transformations logic for the embedding step is done here
     """
 
-    @abstractmethod
     def embedd(self, data_model: ChunkedDataModelT) -> EmbeddedDataModelT:
+        return self.embedd_batch([data_model])[0]
+
+    def embedd_batch(
+        self, data_models: list[ChunkedDataModelT]
+    ) -> list[EmbeddedDataModelT]:
+        if not data_models:
+            return []
+
+        chunk_ids = [data_model.chunk_id for data_model in data_models]
+        if settings.EMBEDDING_CACHE_ENABLED:
+            embeddings = EmbeddingCache().get_many(
+                settings.EMBEDDING_MODEL_ID, chunk_ids
+            )
+        else:
+            embeddings = [None] * len(data_models)
+
+        # Only the chunks that were never embedded before are sent to the model.
+        missing_indices = [
+            i for i, embedding in enumerate(embeddings) if embedding is None
+        ]
+        if missing_indices:
+            missing_embeddings = embedd_texts(
+                [data_models[i].chunk_content for i in missing_indices]
+            )
+            for i, embedding in zip(missing_indices, missing_embeddings):
+                embeddings[i] = embedding
+
+            if settings.EMBEDDING_CACHE_ENABLED:
+                EmbeddingCache().put_many(
+                    settings.EMBEDDING_MODEL_ID,
+                    [chunk_ids[i] for i in missing_indices],
+                    list(missing_embeddings),
+                )
+
+        return [
+            self.to_embedded_model(data_model, embedding)
+            for data_model, embedding in zip(data_models, embeddings)
+        ]
+
+    @abstractmethod
+    def to_embedded_model(
+        self, data_model: ChunkedDataModelT, embedded_content: np.ndarray
+    ) -> EmbeddedDataModelT:
         pass
 
 
 class PostEmbeddingHandler(
     EmbeddingDataHandler[PostChunkModel, PostEmbeddedChunkModel]
 ):
-    def embedd(self, data_model: PostChunkModel) -> PostEmbeddedChunkModel:
+    def to_embedded_model(
+        self, data_model: PostChunkModel, embedded_content: np.ndarray
+    ) -> PostEmbeddedChunkModel:
         return PostEmbeddedChunkModel(
             entry_id=int(data_model.entry_id),
             platform=data_model.platform,
             chunk_id=data_model.chunk_id,
             chunk_content=data_model.chunk_content,
-            embedded_content=embedd_text(data_model.chunk_content),
+            embedded_content=embedded_content,
             author_id=data_model.author_id,
             type=data_model.type,
         )
@@ -46,14 +94,16 @@ class PostEmbeddingHandler(
 class ArticleEmbeddingHandler(
     EmbeddingDataHandler[ArticleChunkModel, ArticleEmbeddedChunkModel]
 ):
-    def embedd(self, data_model: ArticleChunkModel) -> ArticleEmbeddedChunkModel:
+    def to_embedded_model(
+        self, data_model: ArticleChunkModel, embedded_content: np.ndarray
+    ) -> ArticleEmbeddedChunkModel:
         return ArticleEmbeddedChunkModel(
             entry_id=int(data_model.entry_id),
             platform=data_model.platform,
             link=data_model.link,
             chunk_content=data_model.chunk_content,
             chunk_id=data_model.chunk_id,
-            embedded_content=embedd_text(data_model.chunk_content),
+            embedded_content=embedded_content,
             author_id=data_model.author_id,
             type=data_model.type,
         )
@@ -62,14 +112,16 @@ class ArticleEmbeddingHandler(
 class RepositoryEmbeddingHandler(
     EmbeddingDataHandler[RepositoryChunkModel, RepositoryEmbeddedChunkModel]
 ):
-    def embedd(self, data_model: RepositoryChunkModel) -> RepositoryEmbeddedChunkModel:
+    def to_embedded_model(
+        self, data_model: RepositoryChunkModel, embedded_content: np.ndarray
+    ) -> RepositoryEmbeddedChunkModel:
         return RepositoryEmbeddedChunkModel(
             entry_id=int(data_model.entry_id),
             name=data_model.name,
             link=data_model.link,
             chunk_id=data_model.chunk_id,
             chunk_content=data_model.chunk_content,
-            embedded_content=embedd_text(data_model.chunk_content),
+            embedded_content=embedded_content,
             owner_id=data_model.owner_id,
             type=data_model.type,
         )
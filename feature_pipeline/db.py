@@ -1,4 +1,7 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
+from typing import Iterator
 
 from qdrant_client import QdrantClient, models
 from qdrant_client.http.exceptions import UnexpectedResponse
@@ -12,19 +15,33 @@ logger = get_logger(__name__)
 
 @dataclass
 class QdrantDatabaseConnector:
-    _instance: QdrantClient = field(init=False)
+    _instance: QdrantClient | None = field(init=False, default=None)
     host: str = settings.QDRANT_DATABASE_HOST
     port: int = settings.QDRANT_DATABASE_PORT
+    grpc_port: int = settings.QDRANT_DATABASE_GRPC_PORT
+    prefer_grpc: bool = settings.QDRANT_PREFER_GRPC
     url: str | None = settings.QDRANT_CLOUD_URL
     api_key: str | None = settings.QDRANT_APIKEY
+    location: str | None = None  # e.g. ":memory:" for a local, in-process instance
 
     def __post_init__(self) -> None:
         if self._instance is None:
             try:
-                if self.url:
-                    self._instance = QdrantClient(url=self.url, api_key=self.api_key)
+                if self.location:
+                    self._instance = QdrantClient(location=self.location)
+                elif self.url:
+                    self._instance = QdrantClient(
+                        url=self.url,
+                        api_key=self.api_key,
+                        prefer_grpc=self.prefer_grpc,
+                    )
                 else:
-                    self._instance = QdrantClient(host=self.host, port=self.port)
+                    self._instance = QdrantClient(
+                        host=self.host,
+                        port=self.port,
+                        grpc_port=self.grpc_port,
+                        prefer_grpc=self.prefer_grpc,
+                    )
             except UnexpectedResponse:
                 logger.exception(
                     "Couldn't connect to Qdrant.",
@@ -51,14 +68,86 @@ class QdrantDatabaseConnector:
             ),
         )
 
-    def write_data(self, collection_name: str, points: Batch):
+    def write_data(self, collection_name: str, points: Batch, wait: bool = True):
         try:
-            self._instance.upsert(collection_name=collection_name, points=points)
+            self._instance.upsert(
+                collection_name=collection_name, points=points, wait=wait
+            )
         except Exception:
             logger.exception("An error occurred while inserting data.")
 
             raise
 
+    def bulk_write(
+        self,
+        collection_name: str,
+        points: Batch,
+        sub_batch_size: int = settings.QDRANT_BULK_SUB_BATCH_SIZE,
+        parallel: int = settings.QDRANT_BULK_PARALLEL,
+        wait: bool = True,
+        max_retries: int = settings.QDRANT_BULK_MAX_RETRIES,
+        retry_backoff: float = settings.QDRANT_BULK_RETRY_BACKOFF_SECONDS,
+    ) -> None:
+        """
+        Upload a large batch of points split into sub-batches of `sub_batch_size`
+        that are upserted by `parallel` workers. Every failed sub-batch is retried
+        up to `max_retries` times, waiting `retry_backoff` seconds doubled on every
+        attempt.
+        """
+
+        sub_batches = split_batch(points, sub_batch_size)
+        with ThreadPoolExecutor(max_workers=parallel) as executor:
+            futures = [
+                executor.submit(
+                    self._write_with_retries,
+                    collection_name,
+                    sub_batch,
+                    wait,
+                    max_retries,
+                    retry_backoff,
+                )
+                for sub_batch in sub_batches
+            ]
+            for future in futures:
+                future.result()
+
+        logger.info(
+            "Bulk upload finished.",
+            collection_name=collection_name,
+            num=len(points.ids),
+            num_sub_batches=len(sub_batches),
+        )
+
+    def _write_with_retries(
+        self,
+        collection_name: str,
+        points: Batch,
+        wait: bool,
+        max_retries: int,
+        retry_backoff: float,
+    ) -> None:
+        for attempt in range(1, max_retries + 1):
+            try:
+                self.write_data(
+                    collection_name=collection_name, points=points, wait=wait
+                )
+
+                return
+            except Exception as e:
+                if attempt == max_retries:
+                    raise
+
+                backoff = retry_backoff * 2 ** (attempt - 1)
+                logger.warning(
+                    "Failed to upsert sub-batch. Retrying...",
+                    collection_name=collection_name,
+                    num=len(points.ids),
+                    attempt=attempt,
+                    backoff=backoff,
+                    error=str(e),
+                )
+                time.sleep(backoff)
+
     def search(
         self,
         collection_name: str,
@@ -73,9 +162,59 @@ class QdrantDatabaseConnector:
             limit=limit,
         )
 
+    def search_batch(
+        self,
+        collection_name: str,
+        query_vectors: list[list[float]],
+        query_filter: models.Filter | None = None,
+        limit: int = 3,
+    ) -> list[list]:
+        """Search all the query vectors in one request and return the hits per query."""
+
+        return self._instance.search_batch(
+            collection_name=collection_name,
+            requests=[
+                models.SearchRequest(
+                    vector=query_vector,
+                    filter=query_filter,
+                    limit=limit,
+                    with_payload=True,
+                )
+                for query_vector in query_vectors
+            ],
+        )
+
     def scroll(self, collection_name: str, limit: int):
         return self._instance.scroll(collection_name=collection_name, limit=limit)
 
+    def scroll_payloads(
+        self,
+        collection_name: str,
+        payload_fields: list[str] | None = None,
+        page_size: int = settings.QDRANT_SCROLL_PAGE_SIZE,
+    ) -> Iterator[dict]:
+        """
+        Iterate over the payloads of all the points of a collection, one page at a time,
+        by following `next_page_offset`. Vectors are never fetched and the payloads can
+        be restricted to `payload_fields`.
+        """
+
+        offset = None
+        while True:
+            points, offset = self._instance.scroll(
+                collection_name=collection_name,
+                limit=page_size,
+                offset=offset,
+                with_payload=payload_fields if payload_fields is not None else True,
+                with_vectors=False,
+            )
+            for point in points:
+                if point.payload:
+                    yield point.payload
+
+            if offset is None:
+                break
+
     def close(self):
         if self._instance:
             self._instance.close()
@@ -83,3 +222,30 @@ class QdrantDatabaseConnector:
             logger.info("Connected to database has been closed.")
 
             logger.info("Connected to database has been closed.")
+
+
+def split_batch(points: Batch, sub_batch_size: int) -> list[Batch]:
+    ids = list(points.ids)
+    if isinstance(points.vectors, dict):
+        vectors = {name: list(v) for name, v in points.vectors.items()}
+    else:
+        vectors = list(points.vectors)
+    payloads = list(points.payloads) if points.payloads is not None else None
+
+    sub_batches = []
+    for start in range(0, len(ids), sub_batch_size):
+        end = start + sub_batch_size
+        if isinstance(vectors, dict):
+            sub_vectors = {name: v[start:end] for name, v in vectors.items()}
+        else:
+            sub_vectors = vectors[start:end]
+
+        sub_batches.append(
+            Batch(
+                ids=ids[start:end],
+                vectors=sub_vectors,
+                payloads=payloads[start:end] if payloads is not None else None,
+            )
+        )
+
+    return sub_batches
@@ -1,4 +1,5 @@
 import json
+from typing import Iterable, Iterator
 
 
 from feature_pipeline.finetuning.exceptions import JSONDecodeError
@@ -19,3 +20,24 @@ class FileHandler:
     def write_json(self, filename: str, data: list):
         with open(filename, "w") as file:
             json.dump(data, file, indent=4)
+
+    def append_json_line(self, filename: str, record: dict) -> None:
+        self.append_json_lines(filename, [record])
+
+    def append_json_lines(self, filename: str, records: Iterable[dict]) -> None:
+        with open(filename, "a") as file:
+            for record in records:
+                file.write(json.dumps(record) + "\n")
+
+    def iter_json_lines(self, filename: str) -> Iterator[dict]:
+        try:
+            with open(filename, "r") as file:
+                for line in file:
+                    if line.strip():
+                        yield json.loads(line)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"The file '{filename}' does not exist.")
+        except json.JSONDecodeError:
+            raise JSONDecodeError(
+                f"The file '{filename}' is not properly formatted as JSON lines."
+            )
@@ -1,12 +1,18 @@
+import asyncio
+import hashlib
+import itertools
 import json
-import logging
+import os
+from typing import Iterator
 
 from comet_ml import Artifact, Experiment
 
 from feature_pipeline.config import settings
 from feature_pipeline.db import QdrantDatabaseConnector
+from feature_pipeline.finetuning.exceptions import APICommunicationError
 from feature_pipeline.finetuning.file_handler import FileHandler
 from feature_pipeline.finetuning.llm_communication import GptCommunicator
+from feature_pipeline.finetuning.rate_limiter import TokenBucketRateLimiter
 from feature_pipeline.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -69,18 +75,173 @@ class DatasetGenerator:
     def generate_training_data(
         self, collection_name: str, data_type: str, batch_size: int = 1
     ):
-        all_contents = self.fetch_all_cleaned_content(collection_name)
-        response = []
-        for i in range(0, len(all_contents), batch_size):
-            batch = all_contents[i : i + batch_size]
-            prompt = data_formatter.format_prompt(batch, data_type, i)
-            response += self.api_communicator.send_prompt(prompt)
-            for j in range(i, i + batch_size):
-                response[j]["content"] = all_contents[j]
-
-        self.push_to_comet(response, data_type, collection_name)
-
-    def push_to_comet(self, data: list, data_type: str, collection_name: str):
+        file_name = self._reset_output_file(collection_name)
+        for batch_index, batch in enumerate(
+            self.iter_content_batches(collection_name, batch_size)
+        ):
+            prompt = self.data_formatter.format_prompt(
+                batch, data_type, batch_index * batch_size
+            )
+            records = self.api_communicator.send_prompt(prompt)
+            for record, content in zip(records, batch):
+                record["content"] = content
+            self.file_handler.append_json_lines(file_name, records)
+
+        self.push_to_comet(file_name, data_type, collection_name)
+
+    async def agenerate_training_data(
+        self,
+        collection_name: str,
+        data_type: str,
+        batch_size: int = 1,
+        max_concurrency: int = settings.DATASET_GENERATION_MAX_CONCURRENCY,
+    ) -> None:
+        """
+        Concurrent variant of `generate_training_data`. Up to `max_concurrency` batches
+        are in flight at once under the OpenAI requests/tokens per minute limits. Every
+        completed batch is checkpointed under its index and the hash of its contents,
+        so an interrupted run resumes with the batches that are still missing, and a
+        batch whose contents changed in between is generated again. The checkpoint is
+        then rewritten in the batch order of this run as the JSONL dataset, without
+        loading all the records in memory, and deleted once the dataset is pushed to
+        Comet.
+        """
+
+        checkpoint_file = self._get_checkpoint_file(collection_name, batch_size)
+        completed_batches = self._load_checkpoint(checkpoint_file)
+        logger.info(
+            "Generating training data concurrently.",
+            num_completed_batches=len(completed_batches),
+        )
+
+        rate_limiter = TokenBucketRateLimiter(
+            requests_per_minute=settings.OPENAI_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.OPENAI_TOKENS_PER_MINUTE,
+        )
+
+        async def generate_batch(batch_id: str, batch_index: int, batch: list) -> None:
+            prompt = self.data_formatter.format_prompt(
+                batch, data_type, batch_index * batch_size
+            )
+            num_tokens = self.api_communicator.estimate_num_tokens(prompt)
+            await rate_limiter.acquire(num_tokens)
+            try:
+                records = await self.api_communicator.asend_prompt(prompt)
+            except APICommunicationError:
+                logger.exception("Skipping batch!", batch_index=batch_index)
+
+                return
+
+            for record, content in zip(records, batch):
+                record["content"] = content
+
+            completed_batches.add(batch_id)
+            self.file_handler.append_json_line(
+                checkpoint_file, {"batch_id": batch_id, "records": records}
+            )
+
+        # The batches are streamed from Qdrant and at most `max_concurrency` of them
+        # are in flight, so the pending contents never exceed that many batches. Only
+        # the id of every batch is kept, to write the dataset in this run's order.
+        batch_order = {}
+        pending = set()
+        try:
+            for batch_index, batch in enumerate(
+                self.iter_content_batches(collection_name, batch_size)
+            ):
+                batch_id = self._get_batch_id(batch_index, batch)
+                batch_order[batch_id] = batch_index
+                if batch_id in completed_batches:
+                    continue
+
+                if len(pending) >= max_concurrency:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    await asyncio.gather(*done)
+                pending.add(
+                    asyncio.create_task(generate_batch(batch_id, batch_index, batch))
+                )
+
+            await asyncio.gather(*pending)
+        finally:
+            # On an unexpected error, the batches still in flight are cancelled and
+            # awaited instead of being left running unobserved.
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        file_name = self._reset_output_file(collection_name)
+        self._write_ordered_output(checkpoint_file, file_name, batch_order)
+
+        pushed = self.push_to_comet(file_name, data_type, collection_name)
+        if pushed and os.path.exists(checkpoint_file):
+            os.remove(checkpoint_file)
+
+    def _get_checkpoint_file(self, collection_name: str, batch_size: int) -> str:
+        os.makedirs(settings.DATASET_GENERATION_CHECKPOINT_DIR, exist_ok=True)
+
+        return os.path.join(
+            settings.DATASET_GENERATION_CHECKPOINT_DIR,
+            f"{collection_name}-batch_size_{batch_size}.jsonl",
+        )
+
+    @staticmethod
+    def _get_batch_id(batch_index: int, batch: list[str]) -> str:
+        # The index keeps identical batches (e.g. duplicate posts) apart.
+        content_hash = hashlib.md5(json.dumps(batch).encode()).hexdigest()
+
+        return f"{batch_index}-{content_hash}"
+
+    def _load_checkpoint(self, checkpoint_file: str) -> set[str]:
+        if not os.path.exists(checkpoint_file):
+            return set()
+
+        # Entries of older checkpoints, without a matching batch_id, are regenerated.
+        return {
+            checkpoint["batch_id"]
+            for checkpoint in self.file_handler.iter_json_lines(checkpoint_file)
+            if "batch_id" in checkpoint
+        }
+
+    def _reset_output_file(self, collection_name: str) -> str:
+        file_name = f"{collection_name}.jsonl"
+        if os.path.exists(file_name):
+            os.remove(file_name)
+
+        return file_name
+
+    def _write_ordered_output(
+        self, checkpoint_file: str, file_name: str, batch_order: dict[str, int]
+    ) -> None:
+        # Only the offset of every batch in the checkpoint is kept in memory. The
+        # batches are then read back one at a time in their order in this run. The
+        # batches of contents that are no longer in the collection are skipped.
+        if not os.path.exists(checkpoint_file):
+            return
+
+        offsets = {}
+        with open(checkpoint_file, "rb") as file:
+            offset = file.tell()
+            for line in iter(file.readline, b""):
+                if line.strip():
+                    batch_id = json.loads(line).get("batch_id")
+                    if batch_id in batch_order:
+                        offsets[batch_id] = offset
+                offset = file.tell()
+
+        def iter_ordered_records() -> Iterator[dict]:
+            with open(checkpoint_file, "rb") as file:
+                for batch_id in sorted(offsets, key=batch_order.__getitem__):
+                    file.seek(offsets[batch_id])
+
+                    yield from json.loads(file.readline())["records"]
+
+        self.file_handler.append_json_lines(file_name, iter_ordered_records())
+
+    def push_to_comet(
+        self, file_name: str, data_type: str, collection_name: str
+    ) -> bool:
         try:
             logger.info(f"Starting to push data to Comet: {collection_name}")
 
@@ -91,14 +252,6 @@ class DatasetGenerator:
                 workspace=settings.COMET_WORKSPACE,
             )
 
-            file_name = f"{collection_name}.json"
-            logging.info(f"Writing data to file: {file_name}")
-
-            with open(file_name, "w") as f:
-                json.dump(data, f)
-
-            logger.info("Data written to file successfully")
-
             artifact = Artifact(f"{data_type}-instruct-dataset")
             artifact.add(file_name)
             logger.info(f"Artifact created and file added: {file_name}")
@@ -107,24 +260,44 @@ class DatasetGenerator:
             experiment.end()
             logger.info("Data pushed to Comet successfully and experiment ended")
 
+            return True
         except Exception as e:
             logger.error(f"Failed to push data to Comet: {e}", exc_info=True)
 
-    def fetch_all_cleaned_content(self, collection_name: str) -> list:
-        all_cleaned_contents = []
+            return False
 
-        scroll_response = client.scroll(collection_name=collection_name, limit=10000)
-        assert client is not None
-        points = scroll_response[0]
+    def fetch_all_cleaned_content(self, collection_name: str) -> list:
+        return list(self.iter_cleaned_content(collection_name))
 
-        for point in points:
-            if not point.payload:
-                continue
-            cleaned_content = point.payload["cleaned_content"]
+    def iter_cleaned_content(self, collection_name: str) -> Iterator[str]:
+        for payload in client.scroll_payloads(
+            collection_name=collection_name, payload_fields=["cleaned_content"]
+        ):
+            cleaned_content = payload.get("cleaned_content")
             if cleaned_content:
-                all_cleaned_contents.append(cleaned_content)
+                yield cleaned_content
+
+    def iter_content_batches(
+        self, collection_name: str, batch_size: int
+    ) -> Iterator[list[str]]:
+        cleaned_contents = self.iter_cleaned_content(collection_name)
+        while batch := list(itertools.islice(cleaned_contents, batch_size)):
+            yield batch
 
-        return all_cleaned_contents
+
+async def generate_all_training_data(
+    dataset_generator: DatasetGenerator, collections: list[tuple[str, str]]
+) -> None:
+    for collection_name, data_type in collections:
+        logger.info(
+            "Generating training data.",
+            collection_name=collection_name,
+            data_type=data_type,
+        )
+
+        await dataset_generator.agenerate_training_data(
+            collection_name=collection_name, data_type=data_type, batch_size=1
+        )
 
 
 if __name__ == "__main__":
@@ -138,13 +311,5 @@ if __name__ == "__main__":
         ("cleaned_posts", "posts"),
         ("cleaned_repositories", "repositories"),
     ]
-    for collection_name, data_type in collections:
-        logger.info(
-            "Generating training data.",
-            collection_name=collection_name,
-            data_type=data_type,
-        )
-
-        dataset_generator.generate_training_data(
-            collection_name=collection_name, data_type=data_type, batch_size=1
-        )
+    # All the collections run in one event loop, which owns the async OpenAI client.
+    asyncio.run(generate_all_training_data(dataset_generator, collections))
@@ -1,11 +1,17 @@
+import asyncio
 import json
+import random
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI, RateLimitError
 
 from feature_pipeline.config import settings
+from feature_pipeline.finetuning.exceptions import APICommunicationError
 from feature_pipeline.utils.logging import get_logger
 
 MAX_LENGTH = 16384
+# Rough estimates used to budget the tokens per minute before a request is sent.
+CHARS_PER_TOKEN = 4
+ESTIMATED_COMPLETION_TOKENS = 256
 SYSTEM_PROMPT = (
     "You are a technical writer handing someone's account to post about AI and MLOps."
 )
@@ -17,6 +23,7 @@ class GptCommunicator:
     def __init__(self, gpt_model: str = "gpt-3.5-turbo"):
         self.api_key = settings.OPENAI_API_KEY
         self.gpt_model = gpt_model
+        self._async_client = None
 
     def send_prompt(self, prompt: str) -> list:
         try:
@@ -39,6 +46,54 @@ class GptCommunicator:
 
             return []
 
+    async def asend_prompt(
+        self,
+        prompt: str,
+        max_retries: int = settings.OPENAI_MAX_RETRIES,
+        backoff_seconds: float = settings.OPENAI_RETRY_BACKOFF_SECONDS,
+    ) -> list:
+        """
+        Async variant of `send_prompt` that retries rate-limited (429) requests with
+        jittered exponential backoff. Raises APICommunicationError if the batch fails.
+        """
+
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(api_key=self.api_key)
+
+        for attempt in range(max_retries + 1):
+            try:
+                chat_completion = await self._async_client.chat.completions.create(
+                    messages=[
+                        {"role": "system", "content": SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt[:MAX_LENGTH]},
+                    ],
+                    model=self.gpt_model,
+                )
+                response = chat_completion.choices[0].message.content
+                assert response is not None
+
+                return json.loads(self.clean_response(response))
+            except RateLimitError as e:
+                if attempt == max_retries:
+                    raise APICommunicationError(
+                        f"Rate limited after {max_retries} retries."
+                    ) from e
+
+                # Full jitter, so the concurrent requests do not retry in lockstep.
+                delay = random.uniform(0, backoff_seconds * 2**attempt)
+                logger.warning("Rate limited by the API.", attempt=attempt, delay=delay)
+                await asyncio.sleep(delay)
+            except Exception as e:
+                raise APICommunicationError(
+                    "An error occurred while communicating with API."
+                ) from e
+
+    @staticmethod
+    def estimate_num_tokens(prompt: str) -> int:
+        return (
+            len(SYSTEM_PROMPT) + len(prompt[:MAX_LENGTH])
+        ) // CHARS_PER_TOKEN + ESTIMATED_COMPLETION_TOKENS
+
     @staticmethod
     def clean_response(response: str) -> str:
         start_index = response.find("[")
@@ -0,0 +1,51 @@
+import asyncio
+import time
+
+
+class TokenBucketRateLimiter:
+    """
+    Async rate limiter for the OpenAI API with one token bucket for the requests per
+    minute and one for the tokens per minute. `acquire` waits until both buckets hold
+    enough capacity for the next request.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int) -> None:
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._available_requests = float(requests_per_minute)
+        self._available_tokens = float(tokens_per_minute)
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, num_tokens: int) -> None:
+        # A single request can never need more tokens than the bucket holds.
+        num_tokens = min(num_tokens, self.tokens_per_minute)
+
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._available_requests >= 1 and self._available_tokens >= num_tokens:
+                    self._available_requests -= 1
+                    self._available_tokens -= num_tokens
+
+                    return
+
+                wait_seconds = max(
+                    (1 - self._available_requests) / self.requests_per_minute,
+                    (num_tokens - self._available_tokens) / self.tokens_per_minute,
+                ) * 60
+                await asyncio.sleep(wait_seconds)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed_minutes = (now - self._last_refill) / 60
+        self._last_refill = now
+
+        self._available_requests = min(
+            self.requests_per_minute,
+            self._available_requests + elapsed_minutes * self.requests_per_minute,
+        )
+        self._available_tokens = min(
+            self.tokens_per_minute,
+            self._available_tokens + elapsed_minutes * self.tokens_per_minute,
+        )
@@ -1,6 +1,9 @@
+from datetime import timedelta
+
 import bytewax.operators as op
 from bytewax.dataflow import Dataflow
 
+from config import settings
 from db import QdrantDatabaseConnector
 
 from data_flow.stream_input import RabbitMQSource
@@ -11,6 +14,12 @@ from data_logic.dispatchers import (
     EmbeddingDispatcher,
     RawDispatcher,
 )
+from feature_pipeline.utils.embeddings import EmbeddingModelRegistry
+
+if settings.EMBEDDING_MODEL_WARMUP:
+    # Load the chunk and repository (INSTRUCTOR) embedding models when the worker
+    # process starts, not on the first chunk.
+    EmbeddingModelRegistry().warm_up()
 
 connection = QdrantDatabaseConnector()
 
@@ -24,8 +33,18 @@ op.output(
     QdrantOutput(connection=connection, sink_type="clean"),
 )
 stream = op.flat_map("chunk dispatch", stream, ChunkingDispatcher.dispatch_chunker)
-stream = op.map(
-    "embedded chunk dispatch", stream, EmbeddingDispatcher.dispatch_embedder
+# Collect chunks into windows so the encoder embeds a whole batch in a single call.
+keyed_stream = op.key_on("key chunk by type", stream, lambda chunk: chunk.type)
+batched_stream = op.collect(
+    "collect chunk batch",
+    keyed_stream,
+    timeout=timedelta(seconds=settings.EMBEDDING_BATCH_MAX_WAIT_SECONDS),
+    max_size=settings.EMBEDDING_BATCH_SIZE,
+)
+stream = op.flat_map(
+    "embedded chunk batch dispatch",
+    batched_stream,
+    lambda key_batch: EmbeddingDispatcher.dispatch_embedder_batch(key_batch[1]),
 )
 op.output(
     "embedded data insert to qdrant",
@@ -49,14 +49,12 @@ class RabbitMQConnection:
 
     def connect(self):
         try:
-            credentials = pika.PlainCredentials(self.username, self.password)
-            self._connection = pika.BlockingConnection(
-                pika.ConnectionParameters(
-                    host=self.host,
-                    port=self.port,
-                    virtual_host=self.virtual_host,
-                    credentials=credentials,
-                )
+            self._connection = open_blocking_connection(
+                host=self.host,
+                port=self.port,
+                username=self.username,
+                password=self.password,
+                virtual_host=self.virtual_host,
             )
         except pika.exceptions.AMQPConnectionError as e:
             logger.exception("Failed to connect to RabbitMQ.")
@@ -96,3 +94,39 @@ class RabbitMQConnection:
             self._connection = None
 
             logger.info("Closed RabbitMQ connection.")
+
+
+def open_blocking_connection(
+    host: str | None = None,
+    port: int | None = None,
+    username: str | None = None,
+    password: str | None = None,
+    virtual_host: str = "/",
+) -> pika.BlockingConnection:
+    """
+    Open a new connection, not shared with the RabbitMQConnection singleton. A
+    BlockingConnection is not thread-safe, so every consumer thread needs its own.
+    """
+
+    credentials = pika.PlainCredentials(
+        username or settings.RABBITMQ_DEFAULT_USERNAME,
+        password or settings.RABBITMQ_DEFAULT_PASSWORD,
+    )
+
+    return pika.BlockingConnection(
+        pika.ConnectionParameters(
+            host=host or settings.RABBITMQ_HOST,
+            port=port or settings.RABBITMQ_PORT,
+            virtual_host=virtual_host,
+            credentials=credentials,
+        )
+    )
+
+
+def list_queue_shards(queue_name: str, num_shards: int) -> list[str]:
+    """List the queue shards a message published to `queue_name` can be routed to."""
+
+    if num_shards <= 1:
+        return [queue_name]
+
+    return [f"{queue_name}.{shard}" for shard in range(num_shards)]
@@ -7,7 +7,7 @@ from qdrant_client import models
 from rag.query_expanison import QueryExpansion
 from rag.reranking import Reranker
 from rag.self_query import SelfQuery
-from sentence_transformers.SentenceTransformer import SentenceTransformer
+from feature_pipeline.utils.embeddings import EmbeddingModelRegistry
 from config import settings
 
 logger = get_logger(__name__)
@@ -21,66 +21,57 @@ class VectorRetriever:
     def __init__(self, query: str) -> None:
         self._client = QdrantDatabaseConnector()
         self.query = query
-        self._embedder = SentenceTransformer(settings.EMBEDDING_MODEL_ID)
+        self._embedder = EmbeddingModelRegistry().get_sentence_transformer(
+            settings.EMBEDDING_MODEL_ID
+        )
         self._query_expander = QueryExpansion()
         self._metadata_extractor = SelfQuery()
         self._reranker = Reranker()
 
-    def _search_single_query(
-        self, generated_query: str, metadata_filter_value: str | None, k: int
-    ):
+    def _search(
+        self, generated_queries: list[str], metadata_filter_value: str | None, k: int
+    ) -> list:
         assert k > 3, "k should be greater than 3"
 
-        query_vector = self._embedder.encode(generated_query).tolist()
-        vectors = [
-            self._client.search(
-                collection_name="vector_posts",
-                query_filter=models.Filter(
-                    must=[
-                        models.FieldCondition(
-                            key="author_id",
-                            match=models.MatchValue(
-                                value=metadata_filter_value,
-                            ),
-                        )
-                    ]
-                ) if metadata_filter_value else None,
-                query_vector=query_vector,
-                limit=k // 3,
-            ),
-            self._client.search(
-                collection_name="vector_articles",
-                query_filter=models.Filter(
-                    must=[
-                        models.FieldCondition(
-                            key="author_id",
-                            match=models.MatchValue(
-                                value=metadata_filter_value,
-                            ),
-                        )
-                    ]
-                ) if metadata_filter_value else None,
-                query_vector=query_vector,
-                limit=k // 3,
-            ),
-            self._client.search(
-                collection_name="vector_repositories",
-                query_filter=models.Filter(
-                    must=[
-                        models.FieldCondition(
-                            key="owner_id",
-                            match=models.MatchValue(
-                                value=metadata_filter_value,
-                            ),
-                        )
-                    ]
-                ) if metadata_filter_value else None,
-                query_vector=query_vector,
-                limit=k // 3,
-            ),
+        # Embed all the expanded queries at once and search them with one batched
+        # request per collection.
+        query_vectors = self._embedder.encode(generated_queries).tolist()
+        author_filter = self._build_filter("author_id", metadata_filter_value)
+        owner_filter = self._build_filter("owner_id", metadata_filter_value)
+        collections = [
+            ("vector_posts", author_filter),
+            ("vector_articles", author_filter),
+            ("vector_repositories", owner_filter),
         ]
 
-        return utils.flatten(vectors)
+        with concurrent.futures.ThreadPoolExecutor() as executor:
+            search_tasks = [
+                executor.submit(
+                    self._client.search_batch,
+                    collection_name=collection_name,
+                    query_vectors=query_vectors,
+                    query_filter=query_filter,
+                    limit=k // 3,
+                )
+                for collection_name, query_filter in collections
+            ]
+
+            hits = [
+                query_hits
+                for task in search_tasks
+                for query_hits in task.result()
+            ]
+
+        return utils.flatten(hits)
+
+    @staticmethod
+    def _build_filter(key: str, value: str | None) -> models.Filter | None:
+        if not value:
+            return None
+
+        return models.Filter(
+            must=[models.FieldCondition(key=key, match=models.MatchValue(value=value))]
+        )
 
     def retrieve_top_k(self, k: int, to_expand_to_n_queries: int) -> list:
         generated_queries = self._query_expander.generate_response(
@@ -100,16 +91,7 @@ class VectorRetriever:
         else:
             logger.info("Couldn't extract the author_id from the query.")
 
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            search_tasks = [
-                executor.submit(self._search_single_query, query, author_id, k)
-                for query in generated_queries
-            ]
-
-            hits = [
-                task.result() for task in concurrent.futures.as_completed(search_tasks)
-            ]
-            hits = utils.flatten(hits)
+        hits = self._search(generated_queries, author_id, k)
 
         logger.info("All documents retrieved successfully.", num_documents=len(hits))
 
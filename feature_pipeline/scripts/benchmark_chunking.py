@@ -0,0 +1,88 @@
+"""
+Benchmark the chunking step on a corpus of synthetic articles.
+
+Compares the previous implementation, which built both splitters (and loaded the
+sentence-transformers model) on every call, against `utils.chunking.chunk_text`.
+
+Usage: python -m scripts.benchmark_chunking --num-articles 200
+"""
+
+import argparse
+import random
+import time
+
+from langchain.text_splitter import (
+    RecursiveCharacterTextSplitter,
+    SentenceTransformersTokenTextSplitter,
+)
+
+from config import settings
+from utils.chunking import chunk_text
+
+VOCABULARY = (
+    "vector database embedding retrieval pipeline streaming feature model "
+    "inference latency throughput qdrant bytewax rabbitmq chunk token llm rag "
+    "production monitoring dataset finetuning prompt context query search"
+).split()
+
+
+def legacy_chunk_text(text: str) -> list[str]:
+    character_splitter = RecursiveCharacterTextSplitter(
+        separators=["\n\n"], chunk_size=500, chunk_overlap=0
+    )
+    text_split = character_splitter.split_text(text)
+
+    token_splitter = SentenceTransformersTokenTextSplitter(
+        chunk_overlap=50,
+        tokens_per_chunk=settings.EMBEDDING_MODEL_MAX_INPUT_LENGTH,
+        model_name=settings.EMBEDDING_MODEL_ID,
+    )
+    chunks = []
+
+    for section in text_split:
+        chunks.extend(token_splitter.split_text(section))
+
+    return chunks
+
+
+def generate_article(rng: random.Random, num_paragraphs: int) -> str:
+    paragraphs = []
+    for _ in range(num_paragraphs):
+        num_words = rng.randint(40, 400)
+        paragraphs.append(" ".join(rng.choices(VOCABULARY, k=num_words)))
+
+    return "\n\n".join(paragraphs)
+
+
+def run(chunker, corpus: list[str]) -> tuple[int, float]:
+    start_time = time.perf_counter()
+    num_chunks = sum(len(chunker(article)) for article in corpus)
+
+    return num_chunks, time.perf_counter() - start_time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--num-articles", type=int, default=200)
+    parser.add_argument("--num-paragraphs", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = [
+        generate_article(rng, args.num_paragraphs) for _ in range(args.num_articles)
+    ]
+
+    # Warm up the cached tokenizer so the benchmark measures steady-state throughput.
+    chunk_text(corpus[0])
+
+    for name, chunker in (("before", legacy_chunk_text), ("after", chunk_text)):
+        num_chunks, elapsed = run(chunker, corpus)
+        print(
+            f"{name:>6}: {num_chunks} chunks in {elapsed:.2f}s "
+            f"({num_chunks / elapsed:.1f} chunks/sec)"
+        )
+
+
+if __name__ == "__main__":
+    main()
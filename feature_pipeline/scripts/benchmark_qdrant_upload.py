@@ -0,0 +1,90 @@
+"""
+Benchmark the Qdrant upload paths of QdrantDatabaseConnector.
+
+Compares a single blocking `write_data` call against `bulk_write` with several
+sub-batch sizes and degrees of parallelism. Runs against qdrant-client's in-process
+`:memory:` mode by default, or against a running Qdrant with --host
+(optionally over gRPC with --prefer-grpc).
+
+Usage: python -m scripts.benchmark_qdrant_upload --num-points 20000
+"""
+
+import argparse
+import time
+import uuid
+
+import numpy as np
+from qdrant_client.http.models import Batch
+
+from config import settings
+from db import QdrantDatabaseConnector
+
+
+def build_points(num_points: int, dim: int, seed: int) -> Batch:
+    rng = np.random.default_rng(seed)
+    vectors = rng.random((num_points, dim), dtype=np.float32)
+
+    return Batch(
+        ids=[str(uuid.uuid4()) for _ in range(num_points)],
+        vectors=vectors.tolist(),
+        payloads=[{"content": f"chunk {i}", "type": "posts"} for i in range(num_points)],
+    )
+
+
+def timed(name: str, num_points: int, upload) -> None:
+    start_time = time.perf_counter()
+    upload()
+    elapsed = time.perf_counter() - start_time
+
+    print(f"{name:>48}: {elapsed:.2f}s ({num_points / elapsed:.0f} points/sec)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--num-points", type=int, default=20000)
+    parser.add_argument("--host", type=str, default=None)
+    parser.add_argument("--prefer-grpc", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.host:
+        connection = QdrantDatabaseConnector(
+            host=args.host, url=None, prefer_grpc=args.prefer_grpc
+        )
+    else:
+        connection = QdrantDatabaseConnector(location=":memory:")
+
+    points = build_points(args.num_points, settings.EMBEDDING_SIZE, args.seed)
+
+    runs = [
+        ("write_data", lambda name: connection.write_data(name, points)),
+    ]
+    bulk_configs = [(256, 1, True), (1024, 1, True)]
+    if args.host:
+        # The in-process `:memory:` client is not thread-safe, so parallel uploads
+        # and wait=False are only measured against a running Qdrant server.
+        bulk_configs += [(256, 4, True), (1024, 4, True), (256, 4, False)]
+
+    for sub_batch_size, parallel, wait in bulk_configs:
+        runs.append(
+            (
+                f"bulk_write(size={sub_batch_size}, parallel={parallel}, wait={wait})",
+                lambda name, size=sub_batch_size, parallel=parallel, wait=wait: (
+                    connection.bulk_write(
+                        name, points, sub_batch_size=size, parallel=parallel, wait=wait
+                    )
+                ),
+            )
+        )
+
+    for run_name, upload in runs:
+        collection_name = f"benchmark_{uuid.uuid4().hex}"
+        connection.create_vector_collection(collection_name)
+        timed(run_name, args.num_points, lambda: upload(collection_name))
+        connection._instance.delete_collection(collection_name)
+
+    connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import hashlib
+
+import numpy as np
+import pytest
+
+import feature_pipeline.utils.embedding_cache
+from feature_pipeline.config import settings
+from feature_pipeline.utils.embedding_cache import EmbeddingCache, EmbeddingStore
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fixture to control the time seen by the stores."""
+    clock_instance = FakeClock()
+    monkeypatch.setattr(
+        feature_pipeline.utils.embedding_cache.time, "time", clock_instance
+    )
+
+    return clock_instance
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """Fixture to give every test a fresh process-wide cache of 2D embeddings."""
+    monkeypatch.setattr(EmbeddingCache, "_instance", None)
+    monkeypatch.setattr(settings, "EMBEDDING_SIZE", 2)
+
+    return EmbeddingCache(cache_dir=str(tmp_path), capacity=4)
+
+
+def chunk_id(text: str) -> str:
+    return hashlib.md5(text.encode()).hexdigest()
+
+
+def key(text: str) -> bytes:
+    return bytes.fromhex(chunk_id(text))
+
+
+def build_store(path, **kwargs) -> EmbeddingStore:
+    return EmbeddingStore(
+        path=str(path), **{"capacity": 2, "dim": 2, "model_id": "model", **kwargs}
+    )
+
+
+def put(store: EmbeddingStore, text: str, vector: list[float]) -> None:
+    with store.locked():
+        store.put(key(text), np.array(vector, dtype=np.float32))
+
+
+def get(store: EmbeddingStore, text: str) -> list[float] | None:
+    with store.locked():
+        vector = store.get(key(text))
+
+    return None if vector is None else vector.tolist()
+
+
+def test_hits_and_misses_are_counted(cache):
+    """Test that the cache counts a hit for every cached chunk and a miss otherwise."""
+    cache.put_many("model", [chunk_id("a")], [np.array([1.0, 2.0])])
+
+    vectors = cache.get_many("model", [chunk_id("a"), chunk_id("b")])
+
+    assert vectors[0].tolist() == [1.0, 2.0]
+    assert vectors[1] is None
+    assert cache.metrics() == {
+        "hits": 1,
+        "misses": 1,
+        "hit_ratio": 0.5,
+        "size": {"model": 1},
+    }
+
+
+def test_least_recently_used_vector_is_evicted(tmp_path):
+    """Test that a full store overwrites the vector used the longest time ago."""
+    store = build_store(tmp_path)
+    put(store, "a", [1.0, 1.0])
+    put(store, "b", [2.0, 2.0])
+
+    assert get(store, "a") == [1.0, 1.0]
+    put(store, "c", [3.0, 3.0])
+
+    assert get(store, "a") == [1.0, 1.0]
+    assert get(store, "b") is None
+    assert get(store, "c") == [3.0, 3.0]
+    assert len(store) == 2
+
+
+def test_vectors_expire_after_ttl(tmp_path, clock):
+    """Test that a vector written longer than ttl_seconds ago is a miss."""
+    store = build_store(tmp_path, ttl_seconds=60)
+    put(store, "a", [1.0, 1.0])
+
+    clock.now += 60
+    assert get(store, "a") == [1.0, 1.0]
+
+    clock.now += 1
+    assert get(store, "a") is None
+
+    put(store, "a", [2.0, 2.0])
+    assert get(store, "a") == [2.0, 2.0]
+
+
+def test_store_is_reopened_from_disk(tmp_path):
+    """Test that the vectors and their LRU order survive closing the store."""
+    store = build_store(tmp_path)
+    put(store, "a", [1.0, 1.0])
+    put(store, "b", [2.0, 2.0])
+    get(store, "a")
+    store.close()
+
+    store = build_store(tmp_path)
+    put(store, "c", [3.0, 3.0])
+
+    assert get(store, "a") == [1.0, 1.0]
+    assert get(store, "b") is None
+
+
+def test_store_is_rebuilt_when_the_header_does_not_match(tmp_path):
+    """Test that a store opened with another dim, capacity or model is emptied."""
+    store = build_store(tmp_path)
+    put(store, "a", [1.0, 1.0])
+    store.close()
+
+    store = build_store(tmp_path, dim=3)
+    assert len(store) == 0
+    assert get(store, "a") is None
+    store.close()
+
+    store = build_store(tmp_path, dim=3)
+    put(store, "a", [1.0, 1.0, 1.0])
+    store.close()
+
+    store = build_store(tmp_path, model_id="other model", dim=3)
+    assert len(store) == 0
+
+
+def test_store_is_shared_between_processes(tmp_path):
+    """Test that the writes of a store are seen by another store on the same files."""
+    store = build_store(tmp_path)
+    other_store = build_store(tmp_path)
+
+    put(store, "a", [1.0, 1.0])
+    assert get(other_store, "a") == [1.0, 1.0]
+
+    put(other_store, "b", [2.0, 2.0])
+    put(other_store, "c", [3.0, 3.0])
+
+    assert get(store, "a") is None
+    assert get(store, "b") == [2.0, 2.0]
+    assert get(store, "c") == [3.0, 3.0]
+    assert len(store) == 2
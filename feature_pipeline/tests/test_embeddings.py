@@ -0,0 +1,124 @@
+import threading
+
+import pytest
+
+import feature_pipeline.utils.embeddings
+from feature_pipeline.config import settings
+from feature_pipeline.utils.embeddings import EmbeddingModelRegistry
+
+
+class CountingLoader:
+    """Model loader that records every model_id it loads."""
+
+    def __init__(self) -> None:
+        self.loaded: list[str] = []
+
+    def __call__(self, model_id: str) -> object:
+        self.loaded.append(model_id)
+
+        return object()
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Fixture to give every test a fresh process-wide registry."""
+    monkeypatch.setattr(EmbeddingModelRegistry, "_instance", None)
+
+    return EmbeddingModelRegistry(max_size=2)
+
+
+def test_registry_is_a_singleton(registry):
+    """Test that every instantiation returns the same registry."""
+    assert EmbeddingModelRegistry() is registry
+    assert EmbeddingModelRegistry(max_size=10).max_size == 2
+
+
+def test_least_recently_used_model_is_evicted(registry):
+    """Test that a full registry evicts the least recently used model."""
+    loader = CountingLoader()
+    first = registry.get("first", loader)
+    registry.get("second", loader)
+
+    assert registry.get("first", loader) is first
+    registry.get("third", loader)
+    registry.get("second", loader)
+
+    assert loader.loaded == ["first", "second", "third", "second"]
+    assert registry.metrics()["first"]["loaded"] is False
+    assert registry.metrics()["third"]["loaded"] is True
+
+
+def test_concurrent_first_load_loads_once(registry):
+    """Test that threads asking for the same model at once share a single load."""
+    loading = threading.Event()
+    release = threading.Event()
+    loader = CountingLoader()
+
+    def slow_loader(model_id: str) -> object:
+        loading.set()
+        release.wait(timeout=5)
+
+        return loader(model_id)
+
+    models = []
+    threads = [
+        threading.Thread(
+            target=lambda: models.append(registry.get("model", slow_loader))
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    assert loading.wait(timeout=5)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert loader.loaded == ["model"]
+    assert len(models) == 8
+    assert all(model is models[0] for model in models)
+    assert registry.metrics()["model"]["loads"] == 1
+
+
+def test_metrics_count_hits_loads_and_load_time(registry, monkeypatch):
+    """Test that the metrics report the hits, loads and load time of every model."""
+    clock = iter([10.0, 12.5])
+    monkeypatch.setattr(
+        feature_pipeline.utils.embeddings.time, "perf_counter", lambda: next(clock)
+    )
+    loader = CountingLoader()
+
+    registry.get("model", loader)
+    registry.get("model", loader)
+    registry.get("model", loader)
+
+    assert registry.metrics() == {
+        "model": {
+            "loaded": True,
+            "hits": 2,
+            "loads": 1,
+            "load_time_seconds": 2.5,
+        }
+    }
+
+
+def test_warm_up_loads_the_chunk_and_repository_models(registry, monkeypatch):
+    """Test that the warm-up loads both the SentenceTransformer and INSTRUCTOR model."""
+    loader = CountingLoader()
+    monkeypatch.setattr(
+        feature_pipeline.utils.embeddings,
+        "SentenceTransformer",
+        lambda model_id, device: loader(model_id),
+    )
+    monkeypatch.setattr(
+        feature_pipeline.utils.embeddings,
+        "INSTRUCTOR",
+        lambda model_id, device: loader(model_id),
+    )
+
+    registry.warm_up()
+
+    assert loader.loaded == [
+        settings.EMBEDDING_MODEL_ID,
+        settings.REPOSITORY_EMBEDDING_MODEL_ID,
+    ]
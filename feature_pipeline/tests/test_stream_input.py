@@ -0,0 +1,162 @@
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from data_flow.stream_input import RabbitMQPartition
+
+
+class FakeChannel:
+    """Channel stand-in that delivers the queued messages and records the acks."""
+
+    def __init__(self) -> None:
+        self.pending: list[bytes] = []
+        self.acked: list[int] = []
+        self.time_limits: list[float] = []
+        self.broken = False
+        self.closed = False
+        self.on_message = None
+        self._delivery_tag = 0
+        self.connection = SimpleNamespace(process_data_events=self.process_data_events)
+
+    def publish(self, data: dict) -> None:
+        self.pending.append(json.dumps(data).encode())
+
+    def process_data_events(self, time_limit: float) -> None:
+        self.time_limits.append(time_limit)
+        if self.broken:
+            raise ConnectionError("Connection lost.")
+
+        while self.pending:
+            self._delivery_tag += 1
+            method_frame = SimpleNamespace(delivery_tag=self._delivery_tag)
+            self.on_message(self, method_frame, None, self.pending.pop(0))
+
+    def basic_ack(self, delivery_tag: int, multiple: bool = False) -> None:
+        self.acked.append(delivery_tag)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture
+def channel(monkeypatch):
+    """Fixture to back every partition with a fake channel instead of RabbitMQ."""
+    channel_instance = FakeChannel()
+
+    def connect(partition: RabbitMQPartition) -> None:
+        channel_instance.on_message = partition._on_message
+        partition.channel = channel_instance
+
+    monkeypatch.setattr(RabbitMQPartition, "_connect", connect)
+
+    return channel_instance
+
+
+def build_partition(
+    batch_max_size: int = 2, batch_time_budget: float = 0.0
+) -> RabbitMQPartition:
+    return RabbitMQPartition(
+        queue_name="test_queue",
+        batch_max_size=batch_max_size,
+        batch_time_budget=batch_time_budget,
+    )
+
+
+def seconds_until_awake(partition: RabbitMQPartition) -> float:
+    return (partition.next_awake() - datetime.now(timezone.utc)).total_seconds()
+
+
+def test_batch_is_acked_one_snapshot_later(channel):
+    """Test that the messages of an epoch are acked at the snapshot after its own."""
+    partition = build_partition()
+    for i in range(3):
+        channel.publish({"id": i})
+
+    assert partition.next_batch(None) == [{"id": 0}, {"id": 1}]
+    assert partition.snapshot() is None
+    assert channel.acked == []
+
+    assert partition.next_batch(None) == [{"id": 2}]
+    partition.snapshot()
+    assert channel.acked == [1, 2]
+
+    partition.snapshot()
+    assert channel.acked == [1, 2, 3]
+
+
+def test_messages_are_not_acked_on_next_batch_or_close(channel):
+    """Test that neither fetching the next batch nor closing the partition acks."""
+    partition = build_partition(batch_max_size=1)
+    channel.publish({"id": 0})
+    channel.publish({"id": 1})
+
+    partition.next_batch(None)
+    partition.next_batch(None)
+    partition.close()
+
+    assert channel.acked == []
+    assert channel.closed is True
+
+
+def test_buffered_messages_are_not_acked(channel):
+    """Test that the messages received but not emitted yet are not acked."""
+    partition = build_partition(batch_max_size=1)
+    channel.publish({"id": 0})
+    channel.publish({"id": 1})
+
+    partition.next_batch(None)
+    partition.snapshot()
+    partition.snapshot()
+
+    assert channel.acked == [1]
+    assert partition.next_batch(None) == [{"id": 1}]
+
+
+def test_next_batch_does_not_block(channel):
+    """Test that only the messages that already arrived are read."""
+    partition = build_partition()
+
+    assert partition.next_batch(None) == []
+    channel.publish({"id": 0})
+    assert partition.next_batch(None) == [{"id": 0}]
+
+    assert channel.time_limits == [0, 0]
+
+
+def test_partial_batch_waits_for_the_time_budget(channel):
+    """Test that a partial batch is held until the budget of its oldest message."""
+    partition = build_partition(batch_time_budget=60)
+    channel.publish({"id": 0})
+
+    assert partition.next_batch(None) == []
+    assert 0 < seconds_until_awake(partition) <= 60
+
+    channel.publish({"id": 1})
+    assert partition.next_batch(None) == [{"id": 0}, {"id": 1}]
+    assert partition.next_awake() is None
+
+    assert partition.next_batch(None) == []
+    assert 0 < seconds_until_awake(partition) <= 60
+
+
+def test_broken_channel_is_reconnected_later(channel):
+    """Test that a broken channel drops its unacked messages and reconnects later."""
+    partition = build_partition()
+    channel.publish({"id": 0})
+    partition.next_batch(None)
+    partition.snapshot()
+
+    channel.broken = True
+    assert partition.next_batch(None) == []
+    assert partition.channel is None
+    assert seconds_until_awake(partition) > partition.reconnect_delay - 1
+
+    channel.broken = False
+    channel.publish({"id": 1})
+    assert partition.next_batch(None) == [{"id": 1}]
+    partition.snapshot()
+    partition.snapshot()
+
+    assert channel.acked == [2]
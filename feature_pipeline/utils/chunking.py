@@ -1,25 +1,65 @@
-from langchain.text_splitter import (
-    RecursiveCharacterTextSplitter,
-    SentenceTransformersTokenTextSplitter,
-)
+from functools import lru_cache
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from transformers import AutoTokenizer, PreTrainedTokenizerBase
 
 from config import settings
 
+TOKEN_CHUNK_OVERLAP = 50
 
-def chunk_text(text: str) -> list[str]:
-    character_splitter = RecursiveCharacterTextSplitter(
+
+@lru_cache(maxsize=1)
+def get_character_splitter() -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
         separators=["\n\n"], chunk_size=500, chunk_overlap=0
     )
-    text_split = character_splitter.split_text(text)
 
-    token_splitter = SentenceTransformersTokenTextSplitter(
-        chunk_overlap=50,
-        tokens_per_chunk=settings.EMBEDDING_MODEL_MAX_INPUT_LENGTH,
-        model_name=settings.EMBEDDING_MODEL_ID,
-    )
-    chunks = []
 
-    for section in text_split:
-        chunks.extend(token_splitter.split_text(section))
+@lru_cache(maxsize=None)
+def get_tokenizer(model_id: str) -> PreTrainedTokenizerBase:
+    # Only the tokenizer of the embedding model is needed to split on tokens,
+    # so avoid loading the model weights like SentenceTransformersTokenTextSplitter does.
+    return AutoTokenizer.from_pretrained(model_id)
+
+
+def split_token_ids(
+    input_ids: list[int], tokens_per_chunk: int, chunk_overlap: int
+) -> list[list[int]]:
+    """Split a list of token ids into overlapping windows of at most `tokens_per_chunk`."""
+
+    windows = []
+    start_idx = 0
+    while start_idx < len(input_ids):
+        cur_idx = min(start_idx + tokens_per_chunk, len(input_ids))
+        windows.append(input_ids[start_idx:cur_idx])
+        if cur_idx == len(input_ids):
+            break
+
+        start_idx += tokens_per_chunk - chunk_overlap
+
+    return windows
+
+
+def chunk_text(text: str) -> list[str]:
+    text_split = get_character_splitter().split_text(text)
+    if not text_split:
+        return []
+
+    tokenizer = get_tokenizer(settings.EMBEDDING_MODEL_ID)
+    # Tokenize all the sections in one batched call. Special tokens are left out,
+    # the same way the sentence-transformers token splitter strips them.
+    sections_input_ids = tokenizer(
+        text_split, add_special_tokens=False, verbose=False
+    )["input_ids"]
+
+    windows = []
+    for input_ids in sections_input_ids:
+        windows.extend(
+            split_token_ids(
+                input_ids,
+                tokens_per_chunk=settings.EMBEDDING_MODEL_MAX_INPUT_LENGTH,
+                chunk_overlap=TOKEN_CHUNK_OVERLAP,
+            )
+        )
 
-    return chunks
+    return tokenizer.batch_decode(windows)
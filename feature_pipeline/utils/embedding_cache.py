@@ -0,0 +1,298 @@
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterator
+
+import numpy as np
+
+from feature_pipeline.config import settings
+from feature_pipeline.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class EmbeddingStore:
+    """
+    Size-bounded, memory-mapped store of float32 embeddings computed by a single model.
+
+    The vectors live in `vectors.f32` as a (capacity, dim) float32 matrix.
+    The index is kept next to it in compact memory-mapped arrays: the 16 bytes md5
+    digest of the chunk stored in each slot, its last access tick, where a tick of 0
+    marks a free slot, and the time it was written at. When the store is full, the
+    least recently used slot is overwritten, and when `ttl_seconds` is set, a vector
+    written longer ago than that is treated as missing. `header.json` records the
+    capacity, dim and model id the files were created with; a store opened with
+    different values is rebuilt.
+
+    The store is shared by all the processes using the same directory. Every access
+    happens inside `locked()`, which holds an exclusive `flock` on `store.lock` and
+    first catches the in-memory index up with the slots the other processes wrote
+    since: as ticks only grow, those are the slots whose tick is newer than the last
+    tick this process has seen.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        capacity: int,
+        dim: int,
+        model_id: str,
+        ttl_seconds: float | None = None,
+    ) -> None:
+        os.makedirs(path, exist_ok=True)
+
+        self.path = path
+        self.capacity = capacity
+        self.dim = dim
+        self.model_id = model_id
+        self.ttl_seconds = ttl_seconds
+        self._lock_file = open(os.path.join(path, "store.lock"), "a")
+
+        # Slots ordered from the least to the most recently used, so evicting the
+        # least recently used slot is O(1).
+        self._slots: OrderedDict[bytes, int] = OrderedDict()
+        self._slot_keys: list[bytes | None] = [None] * capacity
+        self._free_slots = list(range(capacity - 1, -1, -1))
+        self._tick = 0
+
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            header = {"capacity": capacity, "dim": dim, "model_id": model_id}
+            if self._read_header() != header:
+                self._reset(header)
+
+            self._vectors = self._open(
+                os.path.join(path, "vectors.f32"), np.float32, (capacity, dim)
+            )
+            self._keys = self._open(
+                os.path.join(path, "keys.u8"), np.uint8, (capacity, 16)
+            )
+            self._ticks = self._open(
+                os.path.join(path, "ticks.i64"), np.int64, (capacity,)
+            )
+            self._written_at = self._open(
+                os.path.join(path, "written_at.f64"), np.float64, (capacity,)
+            )
+            self._refresh()
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _read_header(self) -> dict | None:
+        try:
+            with open(os.path.join(self.path, "header.json"), "r") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _reset(self, header: dict) -> None:
+        for filename in ("vectors.f32", "keys.u8", "ticks.i64", "written_at.f64"):
+            file_path = os.path.join(self.path, filename)
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+        with open(os.path.join(self.path, "header.json"), "w") as file:
+            json.dump(header, file)
+
+        logger.info("Embedding cache store rebuilt.", path=self.path, **header)
+
+    @staticmethod
+    def _open(filename: str, dtype, shape: tuple) -> np.memmap:
+        mode = "r+" if os.path.exists(filename) else "w+"
+
+        return np.memmap(filename, dtype=dtype, mode=mode, shape=shape)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            self._refresh()
+
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def get(self, key: bytes) -> np.ndarray | None:
+        slot = self._slots.get(key)
+        if slot is None or self._is_expired(slot):
+            return None
+
+        self._touch(key, slot)
+
+        return np.array(self._vectors[slot])
+
+    def put(self, key: bytes, vector: np.ndarray) -> None:
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._allocate_slot()
+            self._slots[key] = slot
+            self._slot_keys[slot] = key
+            self._keys[slot] = np.frombuffer(key, dtype=np.uint8)
+
+        self._touch(key, slot)
+        self._vectors[slot] = vector
+        self._written_at[slot] = time.time()
+
+    def flush(self) -> None:
+        self._vectors.flush()
+        self._keys.flush()
+        self._ticks.flush()
+        self._written_at.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._lock_file.close()
+
+    def _is_expired(self, slot: int) -> bool:
+        if self.ttl_seconds is None:
+            return False
+
+        return time.time() - self._written_at[slot] > self.ttl_seconds
+
+    def _touch(self, key: bytes, slot: int) -> None:
+        self._tick += 1
+        self._ticks[slot] = self._tick
+        self._slots.move_to_end(key)
+
+    def _refresh(self) -> None:
+        changed_slots = np.flatnonzero(self._ticks > self._tick)
+        if len(changed_slots) == 0:
+            return
+
+        changed_slots = changed_slots[
+            np.argsort(self._ticks[changed_slots], kind="stable")
+        ]
+        for slot in changed_slots.tolist():
+            key = self._keys[slot].tobytes()
+            previous_key = self._slot_keys[slot]
+            # The previous key of a slot reused by another process is gone, unless
+            # it was written again to another slot in the meantime.
+            if previous_key != key and self._slots.get(previous_key) == slot:
+                del self._slots[previous_key]
+
+            self._slot_keys[slot] = key
+            self._slots[key] = slot
+            self._slots.move_to_end(key)
+
+        self._tick = int(self._ticks[changed_slots[-1]])
+
+    def _allocate_slot(self) -> int:
+        # Free slots may have been taken by another process since they were listed.
+        while self._free_slots:
+            slot = self._free_slots.pop()
+            if self._ticks[slot] == 0:
+                return slot
+
+        _, slot = self._slots.popitem(last=False)
+        self._slot_keys[slot] = None
+
+        return slot
+
+
+class EmbeddingCache:
+    """
+    Process-wide cache of chunk embeddings keyed by (model id, md5 of the chunk).
+    Every model gets its own `EmbeddingStore` under `EMBEDDING_CACHE_DIR`, shared by
+    all the worker processes using that directory.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(
+        cls,
+        cache_dir: str | None = None,
+        capacity: int | None = None,
+        ttl_seconds: float | None = None,
+    ):
+        with cls._instance_lock:
+            if not cls._instance:
+                instance = super().__new__(cls)
+                instance._init_cache(
+                    cache_dir or settings.EMBEDDING_CACHE_DIR,
+                    capacity or settings.EMBEDDING_CACHE_MAX_SIZE,
+                    ttl_seconds or settings.EMBEDDING_CACHE_TTL_SECONDS,
+                )
+                cls._instance = instance
+
+        return cls._instance
+
+    def _init_cache(
+        self, cache_dir: str, capacity: int, ttl_seconds: float | None
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self._stores: dict[str, EmbeddingStore] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(
+        self, model_id: str, chunk_ids: list[str]
+    ) -> list[np.ndarray | None]:
+        with self._lock:
+            store = self._get_store(model_id)
+            with store.locked():
+                vectors = [
+                    store.get(bytes.fromhex(chunk_id)) for chunk_id in chunk_ids
+                ]
+
+            num_hits = sum(vector is not None for vector in vectors)
+            self.hits += num_hits
+            self.misses += len(vectors) - num_hits
+
+        return vectors
+
+    def put_many(
+        self, model_id: str, chunk_ids: list[str], vectors: list[np.ndarray]
+    ) -> None:
+        with self._lock:
+            store = self._get_store(model_id)
+            with store.locked():
+                for chunk_id, vector in zip(chunk_ids, vectors):
+                    store.put(bytes.fromhex(chunk_id), vector)
+                store.flush()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "size": {
+                    model_id: len(store) for model_id, store in self._stores.items()
+                },
+            }
+
+    def _get_store(self, model_id: str) -> EmbeddingStore:
+        store = self._stores.get(model_id)
+        if store is None:
+            store = self._open_store(model_id)
+            self._stores[model_id] = store
+
+            logger.info(
+                "Embedding cache store opened.", model_id=model_id, size=len(store)
+            )
+
+        return store
+
+    def _open_store(self, model_id: str) -> EmbeddingStore:
+        return EmbeddingStore(
+            path=os.path.join(
+                self.cache_dir, hashlib.md5(model_id.encode()).hexdigest()
+            ),
+            capacity=self.capacity,
+            dim=settings.EMBEDDING_SIZE,
+            model_id=model_id,
+            ttl_seconds=self.ttl_seconds,
+        )
@@ -1,21 +1,163 @@
-from typing import cast
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Callable, cast
 
 import numpy as np
 from InstructorEmbedding import INSTRUCTOR
 from sentence_transformers.SentenceTransformer import SentenceTransformer
 
 from feature_pipeline.config import settings
+from feature_pipeline.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class EmbeddingModelRegistry:
+    """
+    Process-wide registry of embedding models.
+    Every model is loaded at most once per process and the least recently used one
+    is evicted when more than `max_size` models are kept in memory.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls, max_size: int | None = None):
+        with cls._instance_lock:
+            if not cls._instance:
+                instance = super().__new__(cls)
+                instance._init_registry(
+                    max_size or settings.EMBEDDING_MODEL_REGISTRY_MAX_SIZE
+                )
+                cls._instance = instance
+
+        return cls._instance
+
+    def _init_registry(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._models: OrderedDict[str, object] = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: dict[str, threading.Lock] = {}
+        self._hits: defaultdict[str, int] = defaultdict(int)
+        self._loads: defaultdict[str, int] = defaultdict(int)
+        self._load_time_seconds: defaultdict[str, float] = defaultdict(float)
+
+    def get(self, model_id: str, loader: Callable[[str], object]) -> object:
+        with self._lock:
+            model = self._get_cached(model_id)
+            if model is not None:
+                return model
+
+            load_lock = self._load_locks.setdefault(model_id, threading.Lock())
+
+        # Only the threads that need the same model wait on each other while it loads.
+        with load_lock:
+            with self._lock:
+                model = self._get_cached(model_id)
+                if model is not None:
+                    return model
+
+            start_time = time.perf_counter()
+            model = loader(model_id)
+            load_time = time.perf_counter() - start_time
+
+            with self._lock:
+                self._models[model_id] = model
+                self._loads[model_id] += 1
+                self._load_time_seconds[model_id] += load_time
+                self._evict()
+
+        logger.info(
+            "Embedding model loaded.", model_id=model_id, load_time_seconds=load_time
+        )
+
+        return model
+
+    def get_sentence_transformer(self, model_id: str) -> SentenceTransformer:
+        return cast(
+            SentenceTransformer,
+            self.get(
+                model_id,
+                loader=lambda model_id: SentenceTransformer(
+                    model_id, device=settings.EMBEDDING_MODEL_DEVICE
+                ),
+            ),
+        )
+
+    def get_instructor(self, model_id: str) -> INSTRUCTOR:
+        return cast(
+            INSTRUCTOR,
+            self.get(
+                model_id,
+                loader=lambda model_id: INSTRUCTOR(
+                    model_id, device=settings.EMBEDDING_MODEL_DEVICE
+                ),
+            ),
+        )
+
+    def warm_up(
+        self,
+        model_ids: list[str] | None = None,
+        instructor_model_ids: list[str] | None = None,
+    ) -> None:
+        for model_id in model_ids or [settings.EMBEDDING_MODEL_ID]:
+            self.get_sentence_transformer(model_id)
+
+        for model_id in instructor_model_ids or [
+            settings.REPOSITORY_EMBEDDING_MODEL_ID
+        ]:
+            self.get_instructor(model_id)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                model_id: {
+                    "loaded": model_id in self._models,
+                    "hits": self._hits[model_id],
+                    "loads": self._loads[model_id],
+                    "load_time_seconds": self._load_time_seconds[model_id],
+                }
+                for model_id in self._load_locks
+            }
+
+    def _get_cached(self, model_id: str) -> object | None:
+        model = self._models.get(model_id)
+        if model is not None:
+            self._models.move_to_end(model_id)
+            self._hits[model_id] += 1
+
+        return model
+
+    def _evict(self) -> None:
+        while len(self._models) > self.max_size:
+            model_id, _ = self._models.popitem(last=False)
+
+            logger.info("Embedding model evicted.", model_id=model_id)
 
 
 def embedd_text(text: str) -> np.ndarray:
-    model = SentenceTransformer(settings.EMBEDDING_MODEL_ID)
+    model = EmbeddingModelRegistry().get_sentence_transformer(
+        settings.EMBEDDING_MODEL_ID
+    )
     embeddings = model.encode(text, convert_to_numpy=True)
     return cast(np.ndarray, embeddings)
 
 
+def embedd_texts(texts: list[str]) -> np.ndarray:
+    model = EmbeddingModelRegistry().get_sentence_transformer(
+        settings.EMBEDDING_MODEL_ID
+    )
+    embeddings = model.encode(
+        texts, batch_size=settings.EMBEDDING_BATCH_SIZE, convert_to_numpy=True
+    )
+    return cast(np.ndarray, embeddings)
+
+
 def embedd_repositories(text: str):
-    model = INSTRUCTOR("hkunlp/instructor-xl")
+    model = EmbeddingModelRegistry().get_instructor(
+        settings.REPOSITORY_EMBEDDING_MODEL_ID
+    )
     sentence = text
     instruction = "Represent the structure of the repository"
     return model.encode([instruction, sentence])
-    return model.encode([instruction, sentence])
@@ -20,10 +20,17 @@ class AppSettings(BaseSettings):
     # QdrantDB config
     QDRANT_DATABASE_HOST: str = "localhost"
     QDRANT_DATABASE_PORT: int = 6333
+    QDRANT_DATABASE_GRPC_PORT: int = 6334
+    QDRANT_PREFER_GRPC: bool = False
     QDRANT_DATABASE_URL: str = "http://localhost:6333"
     QDRANT_CLOUD_URL: str = "str"
     USE_QDRANT_CLOUD: bool = False
     QDRANT_APIKEY: str | None = None
+    QDRANT_BULK_SUB_BATCH_SIZE: int = 256
+    QDRANT_BULK_PARALLEL: int = 4
+    QDRANT_BULK_MAX_RETRIES: int = 3
+    QDRANT_BULK_RETRY_BACKOFF_SECONDS: float = 0.5
+    QDRANT_SCROLL_PAGE_SIZE: int = 256
 
     # MQ config
     RABBITMQ_DEFAULT_USERNAME: str = "guest"